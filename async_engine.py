@@ -0,0 +1,206 @@
+import asyncio
+import importlib.util
+import logging
+import threading
+from urllib.parse import urlparse
+
+import httpx
+
+import structured_data
+from tiering import is_valid_result
+from resilience import resilient, error_result
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional 'h2' package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+BROTLI_AVAILABLE = (importlib.util.find_spec('brotli') is not None
+                    or importlib.util.find_spec('brotlicffi') is not None)
+
+
+class EventLoopThread:
+    """Run an asyncio event loop in a background thread for thread-based callers"""
+
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+
+    def start(self):
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+            self.thread.start()
+        return self
+
+    def submit(self, coro):
+        """Schedule a coroutine and return a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self):
+        if self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.loop = None
+        self.thread = None
+
+
+class AsyncStaticEngine:
+    """Static-HTML engine on a pooled, keep-alive asyncio HTTP client
+
+    Replaces the per-call requests.Session + blocking sleep of scrape_with_bs.
+    Fetches run concurrently (bounded globally and per host), the per-host
+    politeness budget is awaited on the loop, and parsing reuses
+    ScraperEngine.parse_with_bs.
+    """
+
+    def __init__(self, scraper, max_connections=100, per_host=4, timeout=15, http2=True):
+        self.scraper = scraper
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.timeout = timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.client = None
+        self.host_limits = {}
+        self.global_limit = None
+        # Background loop used by the synchronous submit() bridge
+        self.loop_thread = EventLoopThread()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def open(self):
+        """Create the shared client (must run inside the event loop that uses it)"""
+        if self.client is not None:
+            return
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            keepalive_expiry=30,
+        )
+        self.client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=limits,
+            timeout=self.timeout,
+            follow_redirects=True,
+        )
+        self.global_limit = asyncio.Semaphore(self.max_connections)
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        self.host_limits = {}
+
+    def host_limit(self, url):
+        """Per-host semaphore, created on first use"""
+        host = urlparse(url).netloc.lower()
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self.host_limits[host]
+
+    def request_headers(self, url):
+        """Rotating headers from ScraperEngine.get_headers, adapted to the pooled client"""
+        headers = self.scraper.get_headers(url)
+        # Connection management belongs to the pool (and is illegal in HTTP/2)
+        headers.pop('Connection', None)
+        if not BROTLI_AVAILABLE:
+            headers['Accept-Encoding'] = 'gzip, deflate'
+        return headers
+
+    async def fetch(self, url, validators=None):
+        """Fetch a page: (status, headers, body bytes, product found while streaming, whether body is the whole page)"""
+        if self.client is None:
+            await self.open()
+        headers = self.request_headers(url)
+        headers.update(validators or {})
+        async with self.host_limit(url):
+            await self.scraper.politeness.wait_async(url)
+            async with self.global_limit:
+                if self.scraper.streaming_fetch:
+                    return await self.fetch_streaming(url, headers)
+                response = await self.client.get(url, headers=headers)
+                self.scraper.politeness.note_response(url, response.status_code, response.headers)
+                if response.status_code != 304:
+                    response.raise_for_status()
+                return response.status_code, response.headers, response.content, None, True
+
+    async def fetch_streaming(self, url, headers):
+        """Stop reading (and drop the connection) once structured data gives name + price"""
+        async with self.client.stream('GET', url, headers=headers) as response:
+            self.scraper.politeness.note_response(url, response.status_code, response.headers)
+            if response.status_code == 304:
+                return response.status_code, response.headers, b'', None, True
+            response.raise_for_status()
+            scanner = structured_data.StreamingProductScanner(response.headers.get('Content-Type'))
+            async for chunk in response.aiter_bytes(16384):
+                scanner.feed(chunk)
+                if scanner.complete:
+                    scanner.truncated = True
+                    break
+        return response.status_code, response.headers, scanner.body, scanner.product(), not scanner.truncated
+
+    @property
+    def resilience(self):
+        return self.scraper.resilience
+
+    @resilient
+    async def scrape(self, url):
+        """Async counterpart of ScraperEngine.scrape_with_bs"""
+        try:
+            cache = self.scraper.http_cache
+            entry = await asyncio.to_thread(cache.get, url) if cache else None
+            if entry and entry['result'] and cache.is_fresh(entry):
+                return dict(entry['result'])
+
+            validators = cache.conditional_headers(entry) if entry else None
+            status, headers, body, product, whole = await self.fetch(url, validators)
+            if status == 304 and entry:
+                return await asyncio.to_thread(self.scraper.revalidated_result, url, entry, headers)
+            # Parsing is CPU bound; keep the loop free for other transfers
+            result = await asyncio.to_thread(self.scraper.parse_with_bs, body, headers.get('Content-Type'), product, url)
+            if cache:
+                # A partial download is cached as its result only
+                await asyncio.to_thread(cache.store, url, headers, body if whole else None,
+                                        result if is_valid_result(result) else None)
+            return result
+        except Exception as e:
+            self.scraper.log_message(f"AsyncHTTP Error: {str(e)}")
+            return error_result(e)
+
+    async def scrape_many(self, urls):
+        """Scrape many URLs concurrently, results in input order"""
+        return await asyncio.gather(*(self.scrape(url) for url in urls))
+
+    def scrape_urls(self, urls):
+        """Blocking helper: scrape a list of URLs on a fresh event loop"""
+        async def run():
+            async with self:
+                return await self.scrape_many(urls)
+        return asyncio.run(run())
+
+    # Synchronous bridge for thread-based callers (e.g. the batch runner)
+
+    def start(self):
+        """Run the engine's event loop in a background thread"""
+        if self.loop_thread.loop is None:
+            self.loop_thread.start()
+            self.loop_thread.submit(self.open()).result()
+        return self
+
+    def submit(self, url):
+        """Schedule a scrape and return a concurrent.futures.Future"""
+        self.start()
+        return self.loop_thread.submit(self.scrape(url))
+
+    def stop(self):
+        """Close the client and stop the background loop"""
+        if self.loop_thread.loop is None:
+            return
+        self.loop_thread.submit(self.aclose()).result()
+        self.loop_thread.stop()
@@ -0,0 +1,348 @@
+import argparse
+import csv
+import importlib
+import logging
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+import parsers
+import prices
+from http_cache import HttpCache
+from price_history import PriceHistory, write_changes
+from rescrape import RescrapePlanner, template_urls
+from result_memo import ResultMemo
+from resilience import error_result
+from results import ResultBatch, PYARROW_AVAILABLE
+from parse_workers import ParseWorkerPool
+from instrumentation import Telemetry, Metrics, OpenTelemetryExporter, OPENTELEMETRY_AVAILABLE
+from engine import ScraperEngine, ENGINES
+
+logger = logging.getLogger(__name__)
+
+# Asyncio engines: name -> (module, class), imported only when selected
+ASYNC_ENGINES = {
+    'AsyncHTTP': ('async_engine', 'AsyncStaticEngine'),
+    'AsyncPlaywright': ('playwright_engine', 'AsyncPlaywrightEngine'),
+}
+
+PRODUCT_NAME_COLUMN = 'Product Name'
+MY_URL_COLUMN = 'My Product URL'
+# Single URL column of run_urls() output
+DISCOVERED_URL_COLUMN = 'Discovered URL'
+
+
+class BatchRunner:
+    """Run one scrape engine over every URL of a product competitor template CSV"""
+
+    def __init__(self, scraper=None, engine='BeautifulSoup', workers=4, window=None, parser_backend=None,
+                 streaming=False, cache_dir=None, cache_ttl=0, memo_path=None, rate=None,
+                 parse_workers=0, telemetry=None, history_path=None, selected_urls=None, results_path=None,
+                 tier_state=None):
+        if engine not in ENGINES and engine not in ASYNC_ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        self.scraper = scraper or ScraperEngine()
+        if parser_backend:
+            self.scraper.parser_backend = parser_backend
+        if streaming:
+            self.scraper.streaming_fetch = True
+        if cache_dir:
+            self.scraper.http_cache = HttpCache(cache_dir, ttl=cache_ttl)
+        if memo_path:
+            self.scraper.result_memo = ResultMemo(path=memo_path)
+        if parse_workers:
+            self.scraper.parse_workers = ParseWorkerPool(parse_workers, parser_backend=self.scraper.parser_backend)
+        if telemetry is not None:
+            self.scraper.telemetry = telemetry
+        if history_path:
+            self.scraper.price_history = PriceHistory(history_path)
+        if tier_state:
+            # Production engine: start from the tiers each domain needed last time
+            self.scraper.tier_policy.load(tier_state)
+            self.scraper.tier_state_path = tier_state
+        # Budgeted cycles scrape only these URLs; the others keep their last result from the history
+        self.selected_urls = set(selected_urls) if selected_urls is not None else None
+        # Every scrape result as typed columns, written to results_path at the end of the run
+        self.results_path = results_path
+        self.results = ResultBatch() if results_path else None
+        self.engine = engine
+        self.workers = max(1, workers)
+        # Per-host budgets; thread engines are dispatched across hosts by the scheduler
+        self.scraper.politeness.max_concurrency = self.workers
+        if rate:
+            self.scraper.politeness.rate = rate
+        # How many CSV rows may be in flight at once (keeps memory bounded)
+        self.window = window or self.workers * 2
+        self.async_engine = None
+        if engine in ASYNC_ENGINES:
+            module_name, class_name = ASYNC_ENGINES[engine]
+            engine_class = getattr(importlib.import_module(module_name), class_name)
+            self.async_engine = self.create_async_engine(engine_class)
+        else:
+            self.scrape = getattr(self.scraper, ENGINES[engine])
+        if engine in ('Selenium', 'Production'):
+            # One warm driver per worker thread
+            self.scraper.selenium_pool_size = self.workers
+            self.scraper.get_selenium_pool()
+
+    def create_async_engine(self, engine_class):
+        """One event loop multiplexes everything; workers bounds the concurrency"""
+        if self.engine == 'AsyncPlaywright':
+            return engine_class(self.scraper, pages_per_browser=self.workers)
+        return engine_class(self.scraper, max_connections=self.workers)
+
+    def url_columns(self, fieldnames):
+        """Return the URL columns of the template, in file order"""
+        return [name for name in fieldnames if name.strip().endswith('URL')]
+
+    def output_columns(self, fieldnames):
+        """Build the header of the enriched price-comparison CSV"""
+        columns = [PRODUCT_NAME_COLUMN] if PRODUCT_NAME_COLUMN in fieldnames else []
+        for url_column in self.url_columns(fieldnames):
+            prefix = self.column_prefix(url_column)
+            columns += [
+                url_column,
+                f"{prefix} Name",
+                f"{prefix} Current Price",
+                f"{prefix} Currency",
+                f"{prefix} Original Price",
+                f"{prefix} Discount",
+            ]
+            if url_column not in (MY_URL_COLUMN, DISCOVERED_URL_COLUMN):
+                columns.append(f"{prefix} Price Difference")
+        columns += ['Cheapest', 'Engine', 'Scraped At']
+        return columns
+
+    def column_prefix(self, url_column):
+        """'Competitor 1 URL' -> 'Competitor 1', 'My Product URL' -> 'My Product'"""
+        return url_column.strip()[:-len('URL')].strip()
+
+    def scrape_url(self, url):
+        """Scrape a single URL, never raising; the result gets its 'elapsed' seconds"""
+        started = time.perf_counter()
+        try:
+            result = self.scrape(url)
+        except Exception as e:
+            logger.warning("%s failed for %s: %s", self.engine, url, e)
+            result = error_result(e)
+        return dict(result, elapsed=time.perf_counter() - started)
+
+    def submit_row(self, row, url_columns):
+        """Submit every non-empty URL of a row and return {column: future}"""
+        futures = {}
+        for column in url_columns:
+            url = (row.get(column) or '').strip()
+            if not url or (self.selected_urls is not None and url not in self.selected_urls):
+                continue
+            if self.async_engine is not None:
+                futures[column] = self.async_engine.submit(url)
+            else:
+                futures[column] = self.scraper.politeness.submit(url, self.scrape_url)
+        return futures
+
+    def previous_result(self, url):
+        """Last successful result of a URL skipped this cycle"""
+        if not url or self.selected_urls is None or self.scraper.price_history is None:
+            return None
+        return self.scraper.price_history.latest_results([url]).get(url)
+
+    def build_output_row(self, row, url_columns, futures):
+        """Merge the scrape results of one template row into an output row"""
+        out = {PRODUCT_NAME_COLUMN: row.get(PRODUCT_NAME_COLUMN, '')}
+        prefixes, urls, results = [], [], []
+        engines_used, scraped_at = set(), []
+        for column in url_columns:
+            prefix = self.column_prefix(column)
+            out[column] = (row.get(column) or '').strip()
+            if column in futures:
+                result = futures[column].result()
+                self.scraper.record_result(out[column], self.engine, result)
+                if self.results is not None:
+                    self.results.add(out[column], result, result.get('engine', self.engine))
+                engines_used.add(result.get('engine', self.engine))
+            else:
+                # Skipped by the budget: the stored result keeps the engine and time it was scraped with
+                result = self.previous_result(out[column])
+                if result is None:
+                    continue
+                engines_used.add(result.get('engine') or self.engine)
+                scraped_at.append(result['scraped_at'])
+            discount = result.get('discount_percent')
+            out[f"{prefix} Name"] = result.get('name', 'Not found')
+            out[f"{prefix} Current Price"] = result.get('current_price', 'Not found')
+            out[f"{prefix} Original Price"] = result.get('original_price') or ''
+            out[f"{prefix} Discount"] = f"{discount}%" if discount else ''
+            prefixes.append(prefix)
+            urls.append(out[column])
+            results.append(result)
+
+        # Price comparison against my product, only between prices in the same currency
+        columns = prices.normalize_results(results, urls)
+        found = {prefix: index for index, prefix in enumerate(prefixes) if columns['price'][index] > 0}
+        for prefix, index in found.items():
+            out[f"{prefix} Currency"] = columns['currency'][index]
+        my_index = found.get(self.column_prefix(MY_URL_COLUMN))
+        if my_index is not None:
+            gaps = prices.gap_column(columns['price'], columns['currency'],
+                                     columns['price'][my_index], columns['currency'][my_index])
+            for prefix, index in found.items():
+                if index != my_index and gaps[index] == gaps[index]:
+                    out[f"{prefix} Price Difference"] = f"{gaps[index]:.2f}"
+        if found:
+            currency = columns['currency'][my_index if my_index is not None else next(iter(found.values()))]
+            comparable = [prefix for prefix, index in found.items() if columns['currency'][index] == currency]
+            out['Cheapest'] = min(comparable, key=lambda prefix: columns['price'][found[prefix]])
+        out['Engine'] = '/'.join(sorted(engines_used)) or self.engine
+        # A row with nothing scraped this cycle is only as fresh as its newest stored result
+        scraped = datetime.now() if futures or not scraped_at else datetime.fromtimestamp(max(scraped_at))
+        out['Scraped At'] = scraped.isoformat(timespec='seconds')
+        return out
+
+    def run(self, input_path, output_path):
+        """Stream the template CSV and write the enriched CSV incrementally"""
+        with open(input_path, newline='', encoding='utf-8-sig') as infile:
+            reader = csv.DictReader(infile)
+            fieldnames = reader.fieldnames or []
+            if not self.url_columns(fieldnames):
+                raise ValueError(f"No URL columns found in {input_path}")
+            return self.run_rows(reader, fieldnames, output_path)
+
+    def run_urls(self, urls, output_path):
+        """Scrape an iterable of URLs (e.g. discovery output) as it is produced, one output row each"""
+        rows = ({DISCOVERED_URL_COLUMN: url} for url in urls)
+        return self.run_rows(rows, [DISCOVERED_URL_COLUMN], output_path)
+
+    def run_rows(self, rows, fieldnames, output_path):
+        rows_done = 0
+        url_columns = self.url_columns(fieldnames)
+        with open(output_path, 'w', newline='', encoding='utf-8') as outfile:
+            writer = csv.DictWriter(outfile, fieldnames=self.output_columns(fieldnames), extrasaction='ignore')
+            writer.writeheader()
+
+            # Rows are written in input order; at most `window` rows are pending
+            pending = deque()
+            if self.async_engine is not None:
+                self.async_engine.start()
+            try:
+                for row in rows:
+                    pending.append((row, self.submit_row(row, url_columns)))
+                    if len(pending) >= self.window:
+                        rows_done += self.flush_row(writer, outfile, pending.popleft(), url_columns)
+                while pending:
+                    rows_done += self.flush_row(writer, outfile, pending.popleft(), url_columns)
+            finally:
+                if self.async_engine is not None:
+                    self.async_engine.stop()
+                self.scraper.close()
+        if self.results is not None:
+            self.results.write(self.results_path)
+            logger.info("Wrote %d results to %s", len(self.results), self.results_path)
+        return rows_done
+
+    def flush_row(self, writer, outfile, item, url_columns):
+        """Wait for one row's scrapes and write it out"""
+        row, futures = item
+        writer.writerow(self.build_output_row(row, url_columns, futures))
+        outfile.flush()
+        logger.info("Done: %s", row.get(PRODUCT_NAME_COLUMN) or row.get(DISCOVERED_URL_COLUMN, ''))
+        return 1
+
+
+def report_changes(history_path, since, output_path=None):
+    """Log (and optionally write) the price changes recorded since the run started"""
+    history = PriceHistory(history_path)
+    try:
+        changes = history.changes(since=since)
+    finally:
+        history.close()
+    for change in changes:
+        logger.warning("Price changed: %s %s -> %s (%s)", change['url'],
+                       prices.format_price(change['previous_price'], change['currency']),
+                       prices.format_price(change['current_price'], change['currency']), change['name'])
+    logger.info("%d price changes", len(changes))
+    if output_path:
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            write_changes(changes, f)
+
+
+def default_output_path(input_path):
+    """product_template.csv -> product_template_results_<timestamp>.csv"""
+    base, _ = os.path.splitext(input_path)
+    return f"{base}_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape every URL of a product competitor template CSV")
+    parser.add_argument('csv', help="product_competitor_template_*.csv")
+    parser.add_argument('-o', '--output', help="Output CSV (default: <input>_results_<timestamp>.csv)")
+    parser.add_argument('-e', '--engine', choices=list(ENGINES) + list(ASYNC_ENGINES), default='BeautifulSoup')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help="Concurrent scrapes (connections / pages for the async engines)")
+    parser.add_argument('-p', '--parser', choices=parsers.BACKENDS, help="HTML parser backend for static engines")
+    parser.add_argument('-s', '--stream', action='store_true',
+                        help="Static engines stop downloading once structured data gives name and price")
+    parser.add_argument('-c', '--cache', metavar='DIR',
+                        help="On-disk HTTP cache for static engines; unchanged pages (304) reuse the last result")
+    parser.add_argument('--cache-ttl', type=int, default=0,
+                        help="Seconds a cached page is reused without revalidating (default: always revalidate)")
+    parser.add_argument('-r', '--rate', type=float,
+                        help="Requests per second per host (default: 0.5; robots.txt Crawl-delay can lower it)")
+    parser.add_argument('-P', '--parse-workers', type=int, default=0, metavar='N',
+                        help="Parse pages in N worker processes (static engines; default: in the fetch threads)")
+    parser.add_argument('-m', '--memo', metavar='FILE',
+                        help="SQLite file keeping extraction results of identical pages across runs")
+    parser.add_argument('--history', metavar='FILE',
+                        help="SQLite price history; every result is appended and price changes are flagged")
+    parser.add_argument('--changes', metavar='CSV',
+                        help="Also write only the URLs whose price changed in this run (needs --history)")
+    parser.add_argument('--results', metavar='FILE',
+                        help="Also write every result as typed columns: .parquet, .arrow / .feather (pyarrow) or .csv")
+    parser.add_argument('--tier-state', metavar='FILE',
+                        help="JSON file keeping the Production engine's per-domain tiers across runs")
+    parser.add_argument('-b', '--budget', type=int, metavar='N',
+                        help="Scrape only the N URLs most likely to have changed (needs --history)")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics while running")
+    parser.add_argument('--otel', action='store_true',
+                        help="Export phase spans through the configured OpenTelemetry tracer provider")
+    args = parser.parse_args(argv)
+    if args.otel and not OPENTELEMETRY_AVAILABLE:
+        parser.error("--otel needs the opentelemetry-api package")
+    if args.results and args.results.endswith(('.parquet', '.arrow', '.feather')) and not PYARROW_AVAILABLE:
+        parser.error("Parquet / Arrow results need the pyarrow package")
+    if (args.changes or args.budget) and not args.history:
+        parser.error("--changes and --budget need --history")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    output_path = args.output or default_output_path(args.csv)
+    telemetry = None
+    if args.metrics_port is not None or args.otel:
+        telemetry = Telemetry(metrics=Metrics(), exporters=[OpenTelemetryExporter()] if args.otel else [])
+        if args.metrics_port is not None:
+            telemetry.metrics.serve(args.metrics_port)
+    selected_urls = None
+    if args.budget is not None:
+        history = PriceHistory(args.history)
+        try:
+            selected_urls = RescrapePlanner(history, args.budget).plan(template_urls(args.csv))
+        finally:
+            history.close()
+    start_time = datetime.now()
+    runner = BatchRunner(engine=args.engine, workers=args.workers, parser_backend=args.parser,
+                         streaming=args.stream, cache_dir=args.cache, cache_ttl=args.cache_ttl,
+                         memo_path=args.memo, rate=args.rate,
+                         parse_workers=args.parse_workers, telemetry=telemetry, history_path=args.history,
+                         selected_urls=selected_urls, results_path=args.results,
+                         tier_state=args.tier_state)
+    rows = runner.run(args.csv, output_path)
+    total_time = (datetime.now() - start_time).total_seconds()
+    logger.info("Wrote %d rows to %s in %.2f seconds", rows, output_path, total_time)
+    if args.history:
+        report_changes(args.history, start_time.timestamp(), args.changes)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+import argparse
+import csv
+import functools
+import http.client
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import extraction
+import parsers
+import structured_data
+from parse_workers import extract_record
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_AVAILABLE = importlib.util.find_spec('resource') is not None
+BENCH_ENGINES = ['BeautifulSoup', 'Selenium', 'Playwright']
+PERCENTILES = (50, 90, 95, 99)
+# Phase order in reports; each engine records only the phases it has
+PHASES = ['launch', 'connect', 'ttfb', 'download', 'navigation', 'parse', 'extract', 'total']
+CSV_FIELDS = ['engine', 'phase', 'count', 'mean_ms', 'min_ms'] + [f'p{p}_ms' for p in PERCENTILES] + \
+             ['max_ms', 'failures', 'cpu_seconds', 'peak_rss_mb', 'children_peak_rss_mb']
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class CorpusServer:
+    """Serves a directory of saved pages on localhost for offline, repeatable runs"""
+
+    def __init__(self, directory, host='127.0.0.1', port=0):
+        self.directory = Path(directory)
+        handler = functools.partial(QuietHandler, directory=str(self.directory))
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def urls(self):
+        """URL of every saved .html / .htm page"""
+        pages = sorted(p for p in self.directory.rglob('*') if p.suffix.lower() in ('.html', '.htm'))
+        return [self.base_url + p.relative_to(self.directory).as_posix() for p in pages]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def percentile(values, q):
+    """q-th percentile of sorted values, interpolating between closest ranks"""
+    k = (len(values) - 1) * q / 100
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+def summarize(samples):
+    """Count, mean, min, percentiles and max of a list of seconds, in milliseconds"""
+    values = sorted(samples)
+    stats = {'count': len(values)}
+    if not values:
+        return stats
+    stats['mean_ms'] = round(sum(values) / len(values) * 1000, 3)
+    stats['min_ms'] = round(values[0] * 1000, 3)
+    for q in PERCENTILES:
+        stats[f'p{q}_ms'] = round(percentile(values, q) * 1000, 3)
+    stats['max_ms'] = round(values[-1] * 1000, 3)
+    return stats
+
+
+class PhaseTimer:
+    """Collects per-phase durations across iterations"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, phase, seconds):
+        self.samples.setdefault(phase, []).append(seconds)
+
+    def time(self, phase, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+
+def benchmark_engine():
+    """A ScraperEngine that does the work and nothing else: no throttling, retries or memo"""
+    from engine import ScraperEngine
+    scraper = ScraperEngine()
+    scraper.result_memo = None
+    scraper.resilience = None
+    scraper.human_scrolling = False
+    scraper.politeness.rate = 1000
+    scraper.politeness.burst = 1000
+    scraper.politeness.jitter = 0
+    scraper.politeness.respect_robots = False
+    return scraper
+
+
+def static_phases(timer, url, parser_backend):
+    """connect / ttfb / download over a fresh connection, then parse and extract the body"""
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(parts.hostname, parts.port, timeout=15)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    try:
+        timer.time('connect', connection.connect)
+        start = time.perf_counter()
+        connection.request('GET', path, headers={'Accept-Encoding': 'identity'})
+        response = connection.getresponse()
+        timer.add('ttfb', time.perf_counter() - start)
+        body = timer.time('download', response.read)
+    finally:
+        connection.close()
+    content_type = response.getheader('Content-Type')
+    # The full DOM path of extract_record, without its structured-data shortcut
+    soup = timer.time('parse', parsers.parse_document, body, parser_backend, content_type)
+    timer.time('extract', lambda: (structured_data.extract_product(body, content_type),
+                                   extraction.DEFAULT_PLAN.run(soup)))
+
+
+def run_static(scraper, urls, iterations, timer):
+    failures = 0
+    for _ in range(iterations):
+        for url in urls:
+            static_phases(timer, url, scraper.parser_backend)
+            result = timer.time('total', scraper.scrape_with_bs, url)
+            failures += result.get('name') == 'Error'
+    return failures
+
+
+def run_selenium(scraper, urls, iterations, timer):
+    failures = 0
+    for _ in range(iterations):
+        driver = timer.time('launch', scraper.create_selenium_driver)
+        try:
+            for url in urls:
+                timer.time('navigation', lambda: (driver.get(url), scraper.wait_for_product_selenium(driver)))
+                timer.time('extract', lambda: extract_record(driver.page_source))
+        finally:
+            driver.quit()
+        for url in urls:
+            result = timer.time('total', scraper.scrape_with_selenium, url)
+            failures += result.get('name') == 'Error'
+    return failures
+
+
+def run_playwright(scraper, urls, iterations, timer):
+    from playwright.sync_api import sync_playwright
+    failures = 0
+    wait_until = 'domcontentloaded' if scraper.wait_for_product else 'networkidle'
+    with sync_playwright() as p:
+        for _ in range(iterations):
+            browser = timer.time('launch', lambda: p.chromium.launch(headless=True))
+            try:
+                context = browser.new_context(user_agent=scraper.get_random_user_agent())
+                if scraper.resource_blocker is not None:
+                    scraper.resource_blocker.apply_playwright(context)
+                page = context.new_page()
+                for url in urls:
+                    timer.time('navigation', lambda: (page.goto(url, wait_until=wait_until, timeout=30000),
+                                                      scraper.wait_for_product_playwright(page)))
+                    timer.time('extract', lambda: extract_record(page.content()))
+            finally:
+                browser.close()
+    # scrape_with_playwright reuses the engine's pooled browser; only its first URL pays the launch
+    for _ in range(iterations):
+        for url in urls:
+            result = timer.time('total', scraper.scrape_with_playwright, url)
+            failures += result.get('name') == 'Error'
+    return failures
+
+
+RUNNERS = {
+    'BeautifulSoup': run_static,
+    'Selenium': run_selenium,
+    'Playwright': run_playwright,
+}
+
+
+def resource_usage():
+    """(cpu_seconds, peak_rss_mb, children_peak_rss_mb) of this process so far"""
+    times = os.times()
+    cpu = times.user + times.system + times.children_user + times.children_system
+    if not RESOURCE_AVAILABLE:
+        return cpu, None, None
+    import resource
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return (cpu, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale)
+
+
+def run_engine(engine, urls, iterations, warmup, parser_backend):
+    """Benchmark one engine; runs in a fresh process so CPU time and peak RSS are its own"""
+    scraper = benchmark_engine()
+    if parser_backend:
+        scraper.parser_backend = parser_backend
+    runner = RUNNERS[engine]
+    report = {'engine': engine}
+    try:
+        if warmup:
+            runner(scraper, urls, warmup, PhaseTimer())
+        cpu_before = resource_usage()[0]
+        timer = PhaseTimer()
+        report['failures'] = runner(scraper, urls, iterations, timer)
+        report['samples'] = timer.samples
+        cpu_after, report['peak_rss_mb'], report['children_peak_rss_mb'] = resource_usage()
+        report['cpu_seconds'] = round(cpu_after - cpu_before, 3)
+    except Exception as e:
+        # Browser errors run to several lines of install hints
+        report['error'] = f"{type(e).__name__}: {str(e).strip().splitlines()[0] if str(e).strip() else ''}"
+    finally:
+        scraper.close()
+    return report
+
+
+def run_benchmark(urls, engines, iterations=10, warmup=1, parser_backend=None):
+    """Report of every engine over the URLs: per-phase stats, CPU time and peak memory"""
+    context = multiprocessing.get_context('spawn')
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'iterations': iterations,
+        'warmup': warmup,
+        'urls': urls,
+        'parser_backend': parser_backend or parsers.DEFAULT_BACKEND,
+        'engines': {},
+    }
+    for engine in engines:
+        logger.info("Benchmarking %s: %d pages x %d iterations", engine, len(urls), iterations)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_engine, engine, urls, iterations, warmup, parser_backend).result()
+        if 'error' in result:
+            logger.warning("%s failed: %s", engine, result['error'])
+        samples = result.pop('samples', {})
+        result['phases'] = {phase: summarize(samples[phase]) for phase in PHASES if phase in samples}
+        result['samples'] = samples
+        report['engines'][engine] = result
+    return report
+
+
+def csv_rows(report):
+    for engine, result in report['engines'].items():
+        for phase, stats in result['phases'].items():
+            row = {'engine': engine, 'phase': phase, 'failures': result.get('failures'),
+                   'cpu_seconds': result.get('cpu_seconds'), 'peak_rss_mb': result.get('peak_rss_mb'),
+                   'children_peak_rss_mb': result.get('children_peak_rss_mb')}
+            row.update(stats)
+            yield row
+
+
+def write_csv(report, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(csv_rows(report))
+
+
+def write_json(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def print_report(report):
+    print(f"{'Engine':<15}{'phase':<12}{'n':>6}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)")
+    for engine, result in report['engines'].items():
+        if 'error' in result:
+            print(f"{engine:<15}failed: {result['error']}")
+            continue
+        for phase, stats in result['phases'].items():
+            print(f"{engine:<15}{phase:<12}{stats['count']:>6}{stats['mean_ms']:>10.1f}{stats['p50_ms']:>10.1f}"
+                  f"{stats['p90_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+        rss = result['peak_rss_mb']
+        print(f"{'':<15}cpu {result['cpu_seconds']:.2f}s, failures {result['failures']}"
+              + (f", peak RSS {rss:.0f} MB (children {result['children_peak_rss_mb']:.0f} MB)" if rss else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay saved pages from a local server and time each engine's phases")
+    parser.add_argument('corpus', help="Directory of saved product pages (*.html)")
+    parser.add_argument('-e', '--engine', nargs='+', choices=BENCH_ENGINES, default=BENCH_ENGINES)
+    parser.add_argument('-n', '--iterations', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=1, help="Untimed iterations first (imports, connections)")
+    parser.add_argument('-p', '--parser', choices=parsers.BACKENDS, help="HTML parser backend for BeautifulSoup")
+    parser.add_argument('--json', metavar='FILE', help="Write the full report, raw samples included")
+    parser.add_argument('--csv', metavar='FILE', help="Write one row of stats per engine and phase")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    with CorpusServer(args.corpus) as server:
+        urls = server.urls()
+        if not urls:
+            parser.error(f"no .html pages in {args.corpus}")
+        report = run_benchmark(urls, args.engine, args.iterations, args.warmup, args.parser)
+    print_report(report)
+    if args.json:
+        write_json(report, args.json)
+    if args.csv:
+        write_csv(report, args.csv)
+    return 0 if all('error' not in r for r in report['engines'].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import extraction
+
+# Texts kept per selector; the fallback loops rarely look past the first few
+MAX_TEXTS_PER_SELECTOR = 50
+
+# Evaluates every selector list in the page and returns one JSON payload:
+# the rendered document plus, per list, the texts the browser engines' loops
+# would read element by element. `xpath` lists go through document.evaluate,
+# the rest through querySelectorAll; `innerText` mirrors Selenium's
+# element.text, textContent Playwright's text_content().
+EXTRACT_SCRIPT = """
+(args) => {
+    const text = (el) => ((args.innerText ? el.innerText : el.textContent) || '').trim();
+    const matches = (selector, xpath) => {
+        try {
+            if (!xpath) {
+                return Array.from(document.querySelectorAll(selector));
+            }
+            const found = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            const nodes = [];
+            for (let i = 0; i < found.snapshotLength; i++) {
+                nodes.push(found.snapshotItem(i));
+            }
+            return nodes;
+        } catch (e) {
+            return [];
+        }
+    };
+    // Text of the first element of the first selector that matches anything
+    const first = (list) => {
+        for (const selector of list.selectors) {
+            const nodes = matches(selector, list.xpath);
+            if (nodes.length) {
+                return text(nodes[0]);
+            }
+        }
+        return null;
+    };
+    // Non-empty texts of every match, per selector
+    const all = (list) => list.selectors.map((selector) =>
+        matches(selector, list.xpath).map(text).filter((t) => t).slice(0, args.limit));
+    const doctype = document.doctype ? new XMLSerializer().serializeToString(document.doctype) : '';
+    return {
+        html: doctype + document.documentElement.outerHTML,
+        original: first(args.original),
+        discounted: first(args.discounted),
+        prices: all(args.prices),
+        was_prices: all(args.was_prices),
+        name: first(args.names),
+    };
+}
+"""
+
+
+def selector_list(selectors, xpath):
+    return {'selectors': list(selectors), 'xpath': xpath}
+
+
+def selenium_arguments():
+    return {
+        'innerText': True,
+        'limit': MAX_TEXTS_PER_SELECTOR,
+        'original': selector_list(extraction.XPATH_ORIGINAL_PRICE_SELECTORS, True),
+        'discounted': selector_list(extraction.XPATH_DISCOUNTED_PRICE_SELECTORS, True),
+        'prices': selector_list(extraction.XPATH_PRICE_SELECTORS, True),
+        'was_prices': selector_list(extraction.XPATH_WAS_PRICE_SELECTORS, True),
+        'names': selector_list(extraction.XPATH_NAME_SELECTORS, True),
+    }
+
+
+def playwright_arguments():
+    return {
+        'innerText': False,
+        'limit': MAX_TEXTS_PER_SELECTOR,
+        'original': selector_list(extraction.CSS_ORIGINAL_PRICE_SELECTORS, False),
+        'discounted': selector_list(extraction.CSS_DISCOUNTED_PRICE_SELECTORS, False),
+        'prices': selector_list(extraction.BROWSER_PRICE_SELECTORS, False),
+        'was_prices': selector_list(extraction.BROWSER_WAS_PRICE_SELECTORS, False),
+        'names': selector_list(extraction.NAME_SELECTORS, False),
+    }
+
+
+def selenium_payload(driver):
+    """One execute_script round-trip for everything scrape_with_selenium reads"""
+    return driver.execute_script(f"return ({EXTRACT_SCRIPT})(arguments[0]);", selenium_arguments())
+
+
+def playwright_payload(page):
+    """One page.evaluate round-trip for everything scrape_with_playwright reads"""
+    return page.evaluate(EXTRACT_SCRIPT, playwright_arguments())
+
+
+def direct_prices(payload, decimal='.'):
+    """(original_price, current_price) from the site-specific selectors"""
+    return extraction.clean_price(payload['original'], decimal), extraction.clean_price(payload['discounted'], decimal)
+
+
+def fallback_prices(payload, original_price, decimal='.'):
+    """(current_price, original_price) from the generic selectors, as the engines' fallback loops pick them"""
+    current_price = None
+    for texts in payload['prices']:
+        current_price = next((price for price in (extraction.clean_price(text, decimal) for text in texts
+                                                  if not is_was_text(text)) if price), None)
+        if current_price:
+            break
+    if not original_price:
+        for texts in payload['was_prices']:
+            original_price = next((price for price in (extraction.clean_price(text, decimal) for text in texts
+                                                       if is_was_text(text))
+                                   if price and (not current_price or price > current_price)), None)
+            if original_price:
+                break
+    return current_price, original_price
+
+
+def is_was_text(text):
+    return any(word in text.lower() for word in extraction.BROWSER_WAS_KEYWORDS)
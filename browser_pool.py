@@ -0,0 +1,226 @@
+import contextvars
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class SeleniumDriverPool:
+    """Pool of warm Selenium drivers shared across scrapes
+
+    Drivers are created lazily up to `size`, handed out with acquire()/release()
+    (or the lease() context manager), health-checked on every lease, wiped of
+    cookies and storage between leases, and recycled after `max_pages` pages
+    or as soon as they stop responding.
+    """
+
+    def __init__(self, create_driver, size=2, max_pages=50):
+        self.create_driver = create_driver
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        # LIFO so the most recently used (warmest) driver is reused first
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.created = 0
+        self.pages = {}
+        self.closed = False
+
+    def warm_up(self, count=None):
+        """Start drivers ahead of time so the first scrapes skip the cold start"""
+        count = self.size if count is None else min(count, self.size)
+        drivers = [self.acquire() for _ in range(count)]
+        for driver in drivers:
+            self.idle.put(driver)
+
+    def acquire(self, timeout=None):
+        """Lease a healthy driver, creating one if the pool is not full"""
+        while True:
+            if self.closed:
+                raise RuntimeError("Driver pool is closed")
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                driver = self.new_driver_or_wait(timeout)
+            if self.is_healthy(driver):
+                return driver
+            logger.info("Recycling unresponsive driver")
+            self.discard(driver)
+
+    def new_driver_or_wait(self, timeout):
+        with self.lock:
+            can_create = self.created < self.size
+            if can_create:
+                self.created += 1
+        if not can_create:
+            try:
+                return self.idle.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("No Selenium driver available")
+        try:
+            driver = self.create_driver()
+        except Exception:
+            with self.lock:
+                self.created -= 1
+            raise
+        self.pages[id(driver)] = 0
+        return driver
+
+    def release(self, driver):
+        """Return a driver after use; recycles it when worn out or broken"""
+        self.pages[id(driver)] = self.pages.get(id(driver), 0) + 1
+        if self.closed or self.pages[id(driver)] >= self.max_pages:
+            self.discard(driver)
+            return
+        try:
+            self.reset(driver)
+        except Exception as e:
+            logger.info("Driver reset failed, recycling: %s", e)
+            self.discard(driver)
+            return
+        self.idle.put(driver)
+
+    def discard(self, driver):
+        """Quit a driver and free its slot"""
+        self.pages.pop(id(driver), None)
+        with self.lock:
+            self.created -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def lease(self, timeout=None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def is_healthy(self, driver):
+        """Cheap liveness probe: the browser still executes scripts"""
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def reset(self, driver):
+        """Clear cookies and storage so the next lease starts clean"""
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            # about:blank and some error pages have no storage
+            pass
+        try:
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+        except Exception:
+            driver.delete_all_cookies()
+        driver.get('about:blank')
+
+    def close(self):
+        """Quit every idle driver; leased drivers are quit on release"""
+        self.closed = True
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(driver)
+
+
+class PlaywrightBrowserPool:
+    """Long-lived sync Playwright browsers for the sync Playwright engine
+
+    The sync API only works on the thread that started it, so a browser
+    can't be handed from one scraping thread to the next. Each browser
+    lives on its own worker thread instead: run(fn, ...) calls
+    fn(browser, ...) on a free worker (in the caller's context, so its
+    telemetry span carries over) and blocks until it returns. Workers start
+    lazily up to `size`; a browser is relaunched when it disconnects and
+    recycled after `max_pages` pages.
+    """
+
+    def __init__(self, launch, size=2, max_pages=50):
+        # launch(playwright) -> browser
+        self.launch = launch
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.workers = []
+        self.pending = 0
+        self.closed = False
+
+    def run(self, fn, *args):
+        """fn(browser, *args) on a worker's browser; re-raises what it raises"""
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Browser pool is closed")
+            self.pending += 1
+            if self.pending > len(self.workers) and len(self.workers) < self.size:
+                worker = threading.Thread(target=self.work, name=f"playwright-{len(self.workers)}", daemon=True)
+                self.workers.append(worker)
+                worker.start()
+        job = {'call': (contextvars.copy_context(), fn, args), 'done': threading.Event()}
+        self.jobs.put(job)
+        try:
+            job['done'].wait()
+        finally:
+            with self.lock:
+                self.pending -= 1
+        if 'error' in job:
+            raise job['error']
+        return job['result']
+
+    def work(self):
+        """Worker thread: owns one Playwright instance and its browser"""
+        playwright = browser = None
+        pages = 0
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                context, fn, args = job['call']
+                try:
+                    if playwright is None:
+                        from playwright.sync_api import sync_playwright
+                        playwright = sync_playwright().start()
+                    if browser is None or pages >= self.max_pages or not browser.is_connected():
+                        if browser is not None:
+                            logger.info("Recycling Playwright browser after %d pages", pages)
+                            self.quit(browser)
+                        browser, pages = self.launch(playwright), 0
+                    pages += 1
+                    job['result'] = context.run(fn, browser, *args)
+                except Exception as e:
+                    job['error'] = e
+                finally:
+                    job['done'].set()
+        finally:
+            if browser is not None:
+                self.quit(browser)
+            if playwright is not None:
+                try:
+                    playwright.stop()
+                except Exception:
+                    pass
+
+    def quit(self, browser):
+        try:
+            browser.close()
+        except Exception:
+            pass
+
+    def close(self, timeout=10):
+        """Stop every worker; each closes its browser on its own thread"""
+        with self.lock:
+            self.closed = True
+            workers, self.workers = self.workers, []
+        for _ in workers:
+            self.jobs.put(None)
+        for worker in workers:
+            worker.join(timeout)
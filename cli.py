@@ -0,0 +1,127 @@
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+
+from engine import ScraperEngine, ENGINES
+from instrumentation import Telemetry, LogExporter
+
+logger = logging.getLogger(__name__)
+
+
+def scrape_url(args):
+    scraper = ScraperEngine()
+    if args.trace:
+        scraper.telemetry = Telemetry(exporters=[LogExporter()])
+        logging.getLogger('instrumentation').setLevel(logging.DEBUG)
+    try:
+        results = {}
+        for engine in args.engine:
+            start = time.perf_counter()
+            result = scraper.scrape(args.url, engine)
+            result['seconds'] = round(time.perf_counter() - start, 3)
+            results[engine] = result
+    finally:
+        scraper.close()
+
+    if args.json:
+        print(json.dumps(results if len(results) > 1 else results[args.engine[0]], indent=2))
+        return 0
+    for engine, result in results.items():
+        print(f"=== {engine} ===")
+        print(scraper.format_price_output(result))
+        print(f"Time taken: {result['seconds']:.2f} seconds")
+    return 0 if any(result.get('status') == 'ok' for result in results.values()) else 1
+
+
+def scrape_csv(args):
+    # Same options as batch_runner.py
+    import batch_runner
+    return batch_runner.main(args.batch_args)
+
+
+def replay(args):
+    # Same options as benchmark.py
+    import benchmark as corpus_benchmark
+    return corpus_benchmark.main(args.bench_args)
+
+
+def benchmark(args):
+    scraper = ScraperEngine()
+    # Time the engines themselves: nothing served from a previous run
+    scraper.result_memo = None
+    if args.no_throttle:
+        scraper.politeness.rate = 1000
+        scraper.politeness.jitter = 0
+    report = {}
+    try:
+        for engine in args.engine:
+            timings = []
+            failures = 0
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                result = scraper.scrape(args.url, engine)
+                timings.append(time.perf_counter() - start)
+                failures += result.get('status') != 'ok'
+            report[engine] = {
+                'iterations': args.iterations,
+                'failures': failures,
+                'min': min(timings),
+                'median': statistics.median(timings),
+                'max': max(timings),
+            }
+    finally:
+        scraper.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"{'Engine':<15}{'runs':>6}{'failed':>8}{'min':>9}{'median':>9}{'max':>9}")
+    for engine, stats in report.items():
+        print(f"{engine:<15}{stats['iterations']:>6}{stats['failures']:>8}"
+              f"{stats['min']:>9.2f}{stats['median']:>9.2f}{stats['max']:>9.2f}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless product price scraper")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log progress to stderr")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    url = commands.add_parser('url', help="Scrape one product URL")
+    url.add_argument('url')
+    url.add_argument('-e', '--engine', nargs='+', choices=list(ENGINES), default=['BeautifulSoup'])
+    url.add_argument('--json', action='store_true', help="Print the result dict as JSON")
+    url.add_argument('--trace', action='store_true', help="Log how long each phase of the scrape took")
+    url.set_defaults(run=scrape_url)
+
+    csv_command = commands.add_parser('csv', help="Scrape a product competitor template CSV (batch_runner.py options)",
+                                      add_help=False)
+    csv_command.add_argument('batch_args', nargs=argparse.REMAINDER)
+    csv_command.set_defaults(run=scrape_csv)
+
+    bench = commands.add_parser('benchmark', help="Time each engine on one URL")
+    bench.add_argument('url')
+    bench.add_argument('-e', '--engine', nargs='+', choices=list(ENGINES), default=list(ENGINES)[:3])
+    bench.add_argument('-n', '--iterations', type=int, default=3)
+    bench.add_argument('--no-throttle', action='store_true',
+                       help="Skip the per-host politeness delay (local test servers only)")
+    bench.add_argument('--json', action='store_true')
+    bench.set_defaults(run=benchmark)
+
+    replay_command = commands.add_parser('replay', help="Per-phase engine benchmark over saved pages (benchmark.py options)",
+                                         add_help=False)
+    replay_command.add_argument('bench_args', nargs=argparse.REMAINDER)
+    replay_command.set_defaults(run=replay)
+
+    args = parser.parse_args(argv)
+    if args.command not in ('csv', 'replay'):
+        logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                            format='%(asctime)s %(levelname)s %(message)s')
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+import argparse
+import gzip
+import hashlib
+import io
+import logging
+import math
+import re
+import sys
+from collections import deque
+from itertools import islice
+from urllib.parse import urljoin, urlsplit, parse_qsl, urlencode, urlunsplit
+from xml.etree import ElementTree
+
+import parsers
+from engine import ENGINES
+from http_cache import normalize_url
+from politeness import PolitenessScheduler, host_of
+
+logger = logging.getLogger(__name__)
+
+# Paths that look like product detail pages on most storefronts
+DEFAULT_PRODUCT_PATTERN = r'/(products?|p|item|dp)/[^/]+'
+# Links to the next page of a category listing, most explicit first
+NEXT_PAGE_SELECTORS = [
+    "link[rel='next']",
+    "a[rel='next']",
+    "a[aria-label*='Next']",
+    "a[aria-label*='next']",
+    "[class*='pagination'] a[class*='next']",
+    "a[class*='next']",
+]
+# Query parameters that number listing pages
+PAGE_PARAMS = ('page', 'p', 'pg')
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class BloomFilter:
+    """Fixed-size seen-set: no false negatives, about error_rate false positives at capacity
+
+    A million URLs at 0.01% take about 2.4 MB instead of the ~100 MB of a
+    set of strings; a false positive skips a URL that was never seen.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.0001):
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, item):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self.positions(item))
+
+    def add(self, item):
+        """Add an item; returns False if it was (probably) there already"""
+        new = False
+        for p in self.positions(item):
+            if not self.bits[p >> 3] & (1 << (p & 7)):
+                self.bits[p >> 3] |= 1 << (p & 7)
+                new = True
+        self.count += new
+        return new
+
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+class Discovery:
+    """Finds product URLs in sitemaps and category listings
+
+    Sitemaps (plain or gzipped, indexes included) are parsed as they
+    download, so neither the file nor the URL list is ever held in memory;
+    only the queue of child sitemaps of an index is kept. Category pages
+    are followed through their next-page links on allowed domains only.
+    Every URL goes through one Bloom filter, and discover() yields each
+    product URL once, as soon as it is found.
+    """
+
+    def __init__(self, product_pattern=DEFAULT_PRODUCT_PATTERN, allowed_domains=(), politeness=None, seen=None,
+                 parser_backend=None, modified_since=None, timeout=30):
+        self.product_pattern = re.compile(product_pattern) if product_pattern else None
+        self.allowed_domains = {d.lower() for d in allowed_domains}
+        self.politeness = politeness or PolitenessScheduler()
+        self.seen = seen if seen is not None else BloomFilter()
+        self.parser_backend = parser_backend
+        # Sitemap <lastmod> cut-off as an ISO date ('2025-04-01'); None keeps everything
+        self.modified_since = modified_since
+        self.timeout = timeout
+        self.session = None
+
+    def get(self, url, stream=False):
+        import requests
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers['User-Agent'] = 'Mozilla/5.0 (compatible; price-scraper discovery)'
+        self.politeness.wait(url)
+        response = self.session.get(url, timeout=self.timeout, stream=stream)
+        self.politeness.note_response(url, response.status_code, response.headers)
+        response.raise_for_status()
+        return response
+
+    def is_product(self, url):
+        return self.product_pattern is None or bool(self.product_pattern.search(urlsplit(url).path))
+
+    # Sitemaps
+
+    def robots_sitemaps(self, site_url):
+        """Sitemaps listed in the site's robots.txt, else /sitemap.xml"""
+        parts = urlsplit(site_url)
+        root = f"{parts.scheme}://{parts.netloc}"
+        sitemaps = []
+        try:
+            response = self.get(f"{root}/robots.txt")
+            sitemaps = [line.split(':', 1)[1].strip() for line in response.text.splitlines()
+                        if line.lower().startswith('sitemap:')]
+        except Exception as e:
+            logger.info("No robots.txt for %s: %s", root, e)
+        return sitemaps or [f"{root}/sitemap.xml"]
+
+    def open_sitemap(self, url):
+        """(response, file object) over the body, gunzipped when the file itself is gzip"""
+        response = self.get(url, stream=True)
+        # Undo Content-Encoding while reading; a .gz file is a second layer, detected by its magic bytes
+        response.raw.decode_content = True
+        # Otherwise urllib3 closes the stream at EOF, before the parser has seen the last buffer
+        response.raw.auto_close = False
+        body = io.BufferedReader(response.raw, buffer_size=65536)
+        if body.peek(2)[:2] == GZIP_MAGIC:
+            body = gzip.GzipFile(fileobj=body)
+        return response, body
+
+    def read_sitemap(self, url):
+        """Yield ('sitemap' | 'url', loc, lastmod) entries of one sitemap file as they are parsed"""
+        response, body = self.open_sitemap(url)
+        try:
+            root = None
+            loc = lastmod = None
+            for event, element in ElementTree.iterparse(body, events=('start', 'end')):
+                if event == 'start':
+                    if root is None:
+                        root = element
+                    continue
+                name = local_name(element.tag)
+                if name == 'loc':
+                    loc = (element.text or '').strip()
+                elif name == 'lastmod':
+                    lastmod = (element.text or '').strip()
+                elif name in ('sitemap', 'url'):
+                    if loc:
+                        yield name, loc, lastmod
+                    loc = lastmod = None
+                    # Drop finished entries so memory stays flat however long the file is
+                    root.clear()
+        finally:
+            response.close()
+
+    def sitemap_urls(self, sitemap_url):
+        """Page URLs of a sitemap or sitemap index, child sitemaps in the order listed"""
+        pending = deque([sitemap_url])
+        while pending:
+            url = pending.popleft()
+            if not self.seen.add(normalize_url(url)):
+                continue
+            try:
+                for kind, loc, lastmod in self.read_sitemap(url):
+                    if self.modified_since and lastmod and lastmod[:10] < self.modified_since:
+                        continue
+                    if kind == 'sitemap':
+                        pending.append(loc)
+                    else:
+                        yield loc
+            except Exception as e:
+                logger.warning("Sitemap %s failed: %s", url, e)
+
+    # Category listings
+
+    def category_urls(self, start_url, max_pages=50):
+        """Product links of a category listing and its following pages"""
+        domain = host_of(start_url)
+        if self.allowed_domains and domain not in self.allowed_domains:
+            raise ValueError(f"{domain} is not an allowed category domain")
+        url = start_url
+        visited = set()
+        for _ in range(max_pages):
+            if url is None or normalize_url(url) in visited:
+                return
+            visited.add(normalize_url(url))
+            try:
+                response = self.get(url)
+            except Exception as e:
+                logger.warning("Category page %s failed: %s", url, e)
+                return
+            soup = parsers.parse_document(response.content, backend=self.parser_backend,
+                                          content_type=response.headers.get('Content-Type'))
+            products = 0
+            for link in soup.select('a[href]'):
+                href = urljoin(url, link.get('href'))
+                if host_of(href) == domain and self.is_product(href):
+                    products += 1
+                    yield href
+            if not products:
+                return
+            url = self.next_page(soup, url)
+
+    def next_page(self, soup, url):
+        for selector in NEXT_PAGE_SELECTORS:
+            element = soup.select_one(selector)
+            if element is not None and element.get('href'):
+                return urljoin(url, element.get('href'))
+        # No link: bump a page number in the query, if there is one
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        for index, (key, value) in enumerate(query):
+            if key.lower() in PAGE_PARAMS and value.isdigit():
+                query[index] = (key, str(int(value) + 1))
+                return urlunsplit(parts._replace(query=urlencode(query)))
+        return None
+
+    # Everything
+
+    def discover(self, sites=(), sitemaps=(), categories=(), max_pages=50):
+        """New product URLs from every source, each yielded once"""
+        sitemaps = list(sitemaps)
+        for site in sites:
+            sitemaps += self.robots_sitemaps(site)
+        for sitemap in sitemaps:
+            for url in self.sitemap_urls(sitemap):
+                if self.is_product(url) and self.seen.add(normalize_url(url)):
+                    yield url
+        for category in categories:
+            for url in self.category_urls(category, max_pages):
+                if self.seen.add(normalize_url(url)):
+                    yield url
+        logger.info("Discovery saw %d distinct URLs", self.seen.count)
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find product URLs in sitemaps and category listings")
+    parser.add_argument('--site', action='append', default=[], help="Site root; its robots.txt sitemaps are read")
+    parser.add_argument('--sitemap', action='append', default=[], help="sitemap.xml / sitemap index (.gz too)")
+    parser.add_argument('--category', action='append', default=[], help="Category listing to page through")
+    parser.add_argument('--domain', action='append', default=[],
+                        help="Domain whose categories may be crawled (default: those of --category)")
+    parser.add_argument('--product-pattern', default=DEFAULT_PRODUCT_PATTERN,
+                        help=f"Regex a product URL path must match (default: {DEFAULT_PRODUCT_PATTERN})")
+    parser.add_argument('--max-pages', type=int, default=50, help="Pages per category listing")
+    parser.add_argument('--since', help="Skip sitemap entries with an older <lastmod> (YYYY-MM-DD)")
+    parser.add_argument('--limit', type=int, help="Stop after this many product URLs")
+    parser.add_argument('-o', '--output', help="Write the URLs, one per line (default: stdout)")
+    parser.add_argument('--scrape', metavar='CSV', help="Scrape the URLs as they are found and write results here")
+    parser.add_argument('-e', '--engine', choices=list(ENGINES), default='BeautifulSoup')
+    parser.add_argument('-w', '--workers', type=int, default=4)
+    parser.add_argument('-r', '--rate', type=float, help="Requests per second per host")
+    parser.add_argument('--history', metavar='FILE', help="SQLite price history for the scraped results")
+    args = parser.parse_args(argv)
+    if not (args.site or args.sitemap or args.category):
+        parser.error("give at least one --site, --sitemap or --category")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    runner = None
+    if args.scrape:
+        from batch_runner import BatchRunner
+        runner = BatchRunner(engine=args.engine, workers=args.workers, rate=args.rate, history_path=args.history)
+        politeness = runner.scraper.politeness
+    else:
+        politeness = PolitenessScheduler(rate=args.rate) if args.rate else None
+    domains = args.domain or [host_of(url) for url in args.category]
+    discovery = Discovery(args.product_pattern, domains, politeness=politeness, modified_since=args.since)
+    try:
+        urls = discovery.discover(args.site, args.sitemap, args.category, args.max_pages)
+        if args.limit:
+            urls = islice(urls, args.limit)
+        if runner is not None:
+            rows = runner.run_urls(urls, args.scrape)
+            logger.info("Scraped %d discovered products into %s", rows, args.scrape)
+        elif args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                for url in urls:
+                    f.write(url + '\n')
+        else:
+            for url in urls:
+                print(url)
+    finally:
+        discovery.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,833 @@
+import logging
+import random
+import time
+
+from browser_pool import SeleniumDriverPool, PlaywrightBrowserPool
+from interception import ResourceBlocker, PRODUCT_READY_SELECTOR
+from tiering import TierPolicy, is_valid_result
+from result_memo import ResultMemo
+from politeness import PolitenessScheduler
+from resilience import Resilience, resilient, error_result, CIRCUIT_OPEN
+from instrumentation import instrumented
+from parse_workers import extract_record
+from results import ScrapeResult
+import browser_extraction
+import extraction
+import parsers
+import prices
+import structured_data
+
+logger = logging.getLogger(__name__)
+
+# Engine name -> method, as used by the CLI, the batch runner and the GUI
+ENGINES = {
+    'BeautifulSoup': 'scrape_with_bs',
+    'Selenium': 'scrape_with_selenium',
+    'Playwright': 'scrape_with_playwright',
+    # Cheapest engine that yields name + price, learned per domain
+    'Production': 'scrape_production',
+}
+
+
+class ScraperEngine:
+    """All scraping engines, without any UI
+
+    Selenium and Playwright are imported on first use of a browser engine,
+    so importing this module (and scraping static pages) needs neither.
+    """
+
+    def __init__(self):
+        # Warm Selenium drivers, created on first use
+        self.selenium_pool = None
+        self.selenium_pool_size = 2
+        self.selenium_max_pages = 50
+        # Long-lived sync Playwright browsers, launched on first use
+        self.playwright_pool = None
+        self.playwright_pool_size = 2
+        self.playwright_max_pages = 50
+        
+        # Browser engines: skip images/fonts/media/trackers (None loads everything)
+        self.resource_blocker = ResourceBlocker()
+        # Extract as soon as price markup or JSON-LD exists instead of waiting for networkidle
+        self.wait_for_product = True
+        self.ready_timeout = 10
+        # Browser engines: scroll a few times with reader-like pauses before extracting
+        self.human_scrolling = True
+        # Browser engines: read the document and every selector in one script call
+        # (False queries each selector / element through the driver)
+        self.batched_extraction = True
+        
+        # Static engines: stop downloading once structured data gives name + price
+        # (a was-price further down such a page is not seen)
+        self.streaming_fetch = False
+        
+        # HTML parser for the static engines ('lxml', 'html.parser' or 'selectolax')
+        self.parser_backend = parsers.DEFAULT_BACKEND
+        
+        # On-disk HTTP cache (http_cache.HttpCache); None fetches everything fresh
+        self.http_cache = None
+        
+        # Process pool for static-engine parsing (parse_workers.ParseWorkerPool); None parses in-thread
+        self.parse_workers = None
+        
+        # Page content hash -> extraction result; None parses every page
+        self.result_memo = ResultMemo()
+        
+        # Per-host request budget (replaces fixed random sleeps before each fetch)
+        self.politeness = PolitenessScheduler()
+        
+        # Retries with backoff and per-host circuit breakers; None makes one attempt
+        self.resilience = Resilience()
+        
+        # Phase spans and scrape metrics (instrumentation.Telemetry); None records nothing
+        self.telemetry = None
+        
+        # Append-only log of every result (price_history.PriceHistory); None keeps nothing
+        self.price_history = None
+        
+        # Production mode: which engine tier each domain needs
+        self.tier_policy = TierPolicy()
+        # JSON file the tier policy is saved to on close() (None forgets it with the process)
+        self.tier_state_path = None
+        
+        # Initialize user agents list
+        self.user_agents = [
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0',
+            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15',
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 Edg/91.0.864.59',
+            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36'
+        ]
+        
+        # Initialize request headers
+        self.base_headers = {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'DNT': '1',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none',
+            'Sec-Fetch-User': '?1',
+            'Cache-Control': 'max-age=0'
+        }
+        
+    def close(self):
+        """Shut down pooled browsers, worker pools and the on-disk caches"""
+        if self.selenium_pool is not None:
+            self.selenium_pool.close()
+            self.selenium_pool = None
+        if self.playwright_pool is not None:
+            self.playwright_pool.close()
+            self.playwright_pool = None
+        if self.http_cache is not None:
+            self.http_cache.close()
+            self.http_cache = None
+        if self.result_memo is not None:
+            self.result_memo.close()
+        self.politeness.shutdown()
+        if self.parse_workers is not None:
+            self.parse_workers.shutdown()
+        if self.telemetry is not None:
+            self.telemetry.close()
+        if self.price_history is not None:
+            self.price_history.close()
+            self.price_history = None
+        if self.tier_state_path:
+            self.tier_policy.save(self.tier_state_path)
+            
+    def log_message(self, message):
+        """Report progress; the GUI shows these in its results tab"""
+        logger.info(message)
+        
+    def record_result(self, url, engine, result):
+        """Append a result to the price history; returns True if the price changed since last time"""
+        if self.price_history is None:
+            return False
+        return self.price_history.record(url, result, engine=result.get('engine', engine))
+        
+    def phase(self, name, **attributes):
+        """Mark the start of the next phase of the running scrape (None ends the current one)"""
+        if self.telemetry is not None:
+            self.telemetry.phase(name, **attributes)
+            
+    def annotate(self, **attributes):
+        """Attach attributes (e.g. bytes) to the running scrape's span"""
+        if self.telemetry is not None:
+            self.telemetry.annotate(**attributes)
+        
+    def scrape(self, url, engine='BeautifulSoup'):
+        """Scrape one URL with the named engine (see ENGINES)"""
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        return getattr(self, ENGINES[engine])(url)
+        
+    def scrape_production(self, url):
+        """Return the cheapest successful extraction, escalating to browsers only when needed"""
+        engines = {
+            'BeautifulSoup': self.scrape_with_bs,
+            'Playwright': self.scrape_with_playwright,
+            'Selenium': self.scrape_with_selenium
+        }
+        best = None
+        for tier in self.tier_policy.plan(url):
+            result = engines[tier](url)
+            result['engine'] = tier
+            if result.get('status') == CIRCUIT_OPEN:
+                # The host is down for every engine; don't blame (or escalate past) this tier
+                return result
+            success = is_valid_result(result)
+            self.tier_policy.record(url, tier, success)
+            if success:
+                return result
+            # Keep the most complete partial result in case every tier fails
+            if best is None or (best.get('name') == 'Error' and result.get('name') != 'Error'):
+                best = result
+            self.log_message(f"{tier} incomplete for {url}, escalating")
+        return best
+        
+    def clean_price(self, price_text, decimal='.'):
+        """Clean and validate price text"""
+        return extraction.clean_price(price_text, decimal)
+            
+    def extract_price(self, soup, selectors):
+        """Extract price using multiple methods"""
+        # Method 1: Try direct price selectors (skipping was/old/msrp/... texts)
+        price, _, _ = extraction.compiled_plan(tuple(selectors), ()).run(soup)
+        if price:
+            return price
+                    
+        # Method 2: Try structured data (JSON-LD, microdata, OpenGraph)
+        price = structured_data.extract_product_from_document(soup)['price']
+        if price:
+            return price
+                
+        # Method 3: Try meta tags
+        meta_selectors = [
+            'meta[property="product:price:amount"]',
+            'meta[property="og:price:amount"]',
+            'meta[name="price"]',
+            'meta[itemprop="price"]'
+        ]
+        for selector in meta_selectors:
+            element = soup.select_one(selector)
+            if element and element.get('content'):
+                price = self.clean_price(element['content'])
+                if price:
+                    return price
+                    
+        return None
+        
+    def get_random_user_agent(self):
+        """Get a random user agent from the list"""
+        return random.choice(self.user_agents)
+        
+    def get_headers(self, url):
+        """Get headers with random user agent and proper referer"""
+        headers = self.base_headers.copy()
+        headers['User-Agent'] = self.get_random_user_agent()
+        # Add referer from major search engines
+        referers = [
+            'https://www.google.com/',
+            'https://www.bing.com/',
+            'https://www.yahoo.com/',
+            'https://duckduckgo.com/'
+        ]
+        headers['Referer'] = random.choice(referers)
+        return headers
+        
+    def add_stealth_selenium_options(self, options):
+        """Add stealth options to Selenium"""
+        # Existing options
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        
+        # Additional stealth options
+        options.add_argument('--disable-infobars')
+        options.add_argument('--disable-browser-side-navigation')
+        options.add_argument('--disable-features=IsolateOrigins,site-per-process')
+        options.add_argument('--disable-site-isolation-trials')
+        options.add_argument('--ignore-certificate-errors')
+        options.add_argument('--ignore-ssl-errors')
+        
+        # Random window size
+        window_sizes = ['1920,1080', '1366,768', '1536,864', '1440,900', '1280,720']
+        options.add_argument(f'--window-size={random.choice(window_sizes)}')
+        
+        # Add random user agent
+        options.add_argument(f'--user-agent={self.get_random_user_agent()}')
+        
+        # Disable automation flags
+        options.add_experimental_option('useAutomationExtension', False)
+        options.add_experimental_option('excludeSwitches', ['enable-automation'])
+        
+        return options
+        
+    def playwright_stealth_settings(self, url):
+        """Random viewport, headers and the automation-masking init script"""
+        # Set random viewport size
+        viewport_sizes = [(1920, 1080), (1366, 768), (1536, 864), (1440, 900), (1280, 720)]
+        viewport = random.choice(viewport_sizes)
+        
+        # Set headers including random user agent
+        headers = self.get_headers(url)
+        
+        # Add JavaScript code to mask automation
+        init_script = """
+            Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+            Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
+            Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
+            window.chrome = { runtime: {} };
+        """
+        
+        return {'width': viewport[0], 'height': viewport[1]}, headers, init_script
+        
+    def configure_playwright_stealth(self, page):
+        """Configure Playwright for stealth"""
+        viewport, headers, init_script = self.playwright_stealth_settings(page.url)
+        page.set_viewport_size(viewport)
+        page.set_extra_http_headers(headers)
+        page.add_init_script(init_script)
+        
+        return page
+        
+    def format_price_output(self, result):
+        """Format the price output string based on available price information"""
+        if isinstance(result, ScrapeResult):
+            result = result.to_dict()
+        name = result.get('name', 'Not found')
+        current_price = result.get('current_price', 'Not found')
+        original_price = result.get('original_price', None)
+        discount_percent = result.get('discount_percent', None)
+        
+        output = [f"Product Name: {name}"]
+        
+        if original_price and current_price != 'Not found':
+            output.append(f"Original Price: {original_price}")
+            output.append(f"Current Price: {current_price}")
+            if discount_percent:
+                output.append(f"Discount: {discount_percent}%")
+        else:
+            output.append(f"Price: {current_price}")
+        if result.get('attempts', 1) > 1:
+            output.append(f"Attempts: {result['attempts']}")
+            
+        return "\n".join(output)
+
+    def calculate_discount_percent(self, original, current):
+        """Calculate discount percentage"""
+        return prices.discount_percent(original, current)
+
+    def price_result(self, name, current_price, original_price, currency=None, url=None):
+        """Result dict of float prices: display strings in the page's currency plus the typed values
+
+        A page that names no currency is priced in its site's (a .co.uk URL is GBP).
+        """
+        currency = currency or (prices.currency_for_domain(url) if url else None)
+        return {
+            'name': name or 'Not found',
+            'current_price': prices.format_price(current_price, currency) or 'Not found',
+            'original_price': prices.format_price(original_price, currency),
+            'discount_percent': self.calculate_discount_percent(original_price, current_price),
+            'price_value': current_price or None,
+            'original_price_value': original_price or None,
+            'currency': currency,
+        }
+
+    def extract_prices(self, soup, price_selectors, was_price_selectors):
+        """Extract both current and original prices"""
+        plan = extraction.compiled_plan(tuple(price_selectors), tuple(was_price_selectors))
+        current_price, original_price, _ = plan.run(soup)
+        return current_price, original_price
+
+    @instrumented('BeautifulSoup')
+    @resilient
+    def scrape_with_bs(self, url):
+        try:
+            # Within the cache TTL the stored result is reused without a request
+            self.phase('cache_lookup')
+            cache = self.http_cache
+            entry = cache.get(url) if cache else None
+            if entry and entry['result'] and cache.is_fresh(entry):
+                return dict(entry['result'])
+            
+            headers = self.get_headers(url)
+            if entry:
+                headers.update(cache.conditional_headers(entry))
+            self.phase('politeness_wait')
+            self.politeness.wait(url)
+            
+            # Imported here: it is most of this module's import time
+            import requests
+            session = requests.Session()
+            self.phase('fetch')
+            if self.streaming_fetch:
+                response, scanner = self.fetch_streaming(session, url, headers)
+                if response.status_code == 304 and entry:
+                    return self.revalidated_result(url, entry, response.headers)
+                body = scanner.body
+                self.annotate(bytes=len(body))
+                self.phase('parse')
+                result = self.parse_with_bs(body, scanner.content_type, product=scanner.product(), url=url)
+                if scanner.truncated:
+                    # Only a prefix of the page arrived: cache the result, not the body
+                    body = None
+            else:
+                response = session.get(url, headers=headers, timeout=15)
+                self.politeness.note_response(url, response.status_code, response.headers)
+                if response.status_code == 304 and entry:
+                    return self.revalidated_result(url, entry, response.headers)
+                response.raise_for_status()
+                body = response.content
+                self.annotate(bytes=len(body))
+                # Parse straight from bytes; the encoding is detected once
+                self.phase('parse')
+                result = self.parse_with_bs(body, response.headers.get('Content-Type'), url=url)
+            
+            if cache:
+                self.phase('cache_store')
+                cache.store(url, response.headers, body, result if is_valid_result(result) else None)
+            return result
+            
+        except Exception as e:
+            self.phase(None)
+            self.log_message(f"BeautifulSoup Error: {str(e)}")
+            return error_result(e)
+            
+    def fetch_streaming(self, session, url, headers):
+        """Download in chunks until structured data resolves name and price, then drop the connection"""
+        response = session.get(url, headers=headers, timeout=15, stream=True)
+        self.politeness.note_response(url, response.status_code, response.headers)
+        scanner = structured_data.StreamingProductScanner(response.headers.get('Content-Type'))
+        try:
+            if response.status_code == 304:
+                return response, scanner
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=16384):
+                scanner.feed(chunk)
+                if scanner.complete:
+                    scanner.truncated = True
+                    break
+        finally:
+            response.close()
+        return response, scanner
+        
+    def revalidated_result(self, url, entry, headers):
+        """Answer a 304 from the cache: the stored result, else a parse of the stored body"""
+        self.http_cache.mark_revalidated(url, headers)
+        if entry['result']:
+            return dict(entry['result'])
+        result = self.parse_with_bs(self.http_cache.body(entry), entry['content_type'], url=url)
+        if is_valid_result(result):
+            self.http_cache.store_result(url, result)
+        return result
+        
+    def parse_with_bs(self, html, content_type=None, product=None, url=None):
+        """Extract name and prices from an already fetched HTML document (str or bytes)
+
+        The page's URL picks the decimal separator its prices are read with.
+        """
+        decimal = prices.decimal_for_domain(url) if url else '.'
+        if self.result_memo is None:
+            return self.extract_from_html(html, content_type, product, decimal, url)
+        # A byte-identical page on a site with the same separator and currency gives the same result
+        site_currency = prices.currency_for_domain(url) if url else None
+        key = self.result_memo.key(html, 'static', self.parser_backend, content_type, decimal, site_currency)
+        result = self.result_memo.get(key)
+        if result is None:
+            result = self.extract_from_html(html, content_type, product, decimal, url)
+            self.result_memo.put(key, result)
+        return result
+        
+    def extract_from_html(self, html, content_type=None, product=None, decimal='.', url=None):
+        """parse_with_bs without the memo"""
+        if self.parse_workers is not None:
+            record = self.parse_workers.parse(html, content_type, product, decimal)
+        else:
+            record = extract_record(html, content_type, product, self.parser_backend, decimal)
+        return self.price_result(*record, url=url)
+
+    def extract_prices_selenium(self, driver, decimal='.'):
+        """Extract original and discounted prices using Selenium"""
+        from selenium.webdriver.common.by import By
+        
+        original_price = None
+        discounted_price = None
+
+        # Extract original price
+        for selector in extraction.XPATH_ORIGINAL_PRICE_SELECTORS:
+            try:
+                element = driver.find_element(By.XPATH, selector)
+                original_price = self.clean_price(element.text, decimal)
+                break
+            except:
+                continue
+
+        # Extract discounted price
+        for selector in extraction.XPATH_DISCOUNTED_PRICE_SELECTORS:
+            try:
+                element = driver.find_element(By.XPATH, selector)
+                discounted_price = self.clean_price(element.text, decimal)
+                break
+            except:
+                continue
+
+        return original_price, discounted_price
+
+    def fallback_prices_selenium(self, driver, original_price, decimal='.'):
+        """(current_price, original_price) from the generic XPath selectors"""
+        from selenium.webdriver.common.by import By
+        
+        current_price = None
+        # Find current price
+        for selector in extraction.XPATH_PRICE_SELECTORS:
+            try:
+                elements = driver.find_elements(By.XPATH, selector)
+                for element in elements:
+                    text = element.text.strip()
+                    if text and not any(word in text.lower() for word in extraction.BROWSER_WAS_KEYWORDS):
+                        price = self.clean_price(text, decimal)
+                        if price:
+                            current_price = price
+                            break
+                if current_price:
+                    break
+            except:
+                continue
+                
+        # Find original price if not found yet
+        if not original_price:
+            for selector in extraction.XPATH_WAS_PRICE_SELECTORS:
+                try:
+                    elements = driver.find_elements(By.XPATH, selector)
+                    for element in elements:
+                        text = element.text.strip()
+                        if text and any(word in text.lower() for word in extraction.BROWSER_WAS_KEYWORDS):
+                            price = self.clean_price(text, decimal)
+                            if price and (not current_price or price > current_price):
+                                original_price = price
+                                break
+                    if original_price:
+                        break
+                except:
+                    continue
+        return current_price, original_price
+        
+    def extract_name_selenium(self, driver):
+        """Product name from the first XPath name selector that matches"""
+        from selenium.webdriver.common.by import By
+        
+        name = None
+        for selector in extraction.XPATH_NAME_SELECTORS:
+            try:
+                element = driver.find_element(By.XPATH, selector)
+                name = element.text.strip()
+                break
+            except:
+                continue
+        return name
+
+    def create_selenium_driver(self):
+        """Launch a headless Chrome with the stealth options applied once"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')
+        chrome_options = self.add_stealth_selenium_options(chrome_options)
+        if self.wait_for_product:
+            # driver.get returns at DOMContentLoaded; wait_for_product_selenium does the rest
+            chrome_options.page_load_strategy = 'eager'
+        driver = webdriver.Chrome(options=chrome_options)
+        if self.resource_blocker is not None:
+            self.resource_blocker.apply_selenium(driver)
+        return driver
+        
+    def wait_for_product_selenium(self, driver):
+        """Wait until price markup or JSON-LD is present (never raises)"""
+        if not self.wait_for_product:
+            return
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        try:
+            WebDriverWait(driver, self.ready_timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, PRODUCT_READY_SELECTOR)))
+        except Exception:
+            self.log_message("Selenium: no price markup found before timeout, extracting anyway")
+            
+    def wait_for_product_playwright(self, page):
+        """Wait until price markup or JSON-LD is present (never raises)"""
+        if not self.wait_for_product:
+            return
+        try:
+            page.wait_for_selector(PRODUCT_READY_SELECTOR, state='attached', timeout=self.ready_timeout * 1000)
+        except Exception:
+            self.log_message("Playwright: no price markup found before timeout, extracting anyway")
+        
+    def get_selenium_pool(self):
+        """Return the shared driver pool, creating it on first use"""
+        if self.selenium_pool is None:
+            self.selenium_pool = SeleniumDriverPool(
+                self.create_selenium_driver,
+                size=self.selenium_pool_size,
+                max_pages=self.selenium_max_pages
+            )
+        return self.selenium_pool
+        
+    @instrumented('Selenium')
+    @resilient
+    def scrape_with_selenium(self, url):
+        pool = self.get_selenium_pool()
+        
+        try:
+            self.phase('politeness_wait')
+            self.politeness.wait(url)
+            # Launches Chrome when no warm driver is free
+            self.phase('driver_acquire')
+            driver = pool.acquire()
+            self.phase('navigation')
+            driver.get(url)
+            self.phase('wait_ready')
+            self.wait_for_product_selenium(driver)
+            
+            # Add random scrolling
+            self.phase('scroll')
+            for _ in range(random.randint(3, 7) if self.human_scrolling else 0):
+                driver.execute_script(f"window.scrollTo(0, {random.randint(100, 1000)});")
+                time.sleep(random.uniform(0.5, 1.5))
+                
+            self.phase('page_source')
+            payload = browser_extraction.selenium_payload(driver) if self.batched_extraction else None
+            decimal = prices.decimal_for_domain(url)
+            html = payload['html'] if payload is not None else driver.page_source
+            self.annotate(bytes=len(html))
+            memo_key = self.result_memo.key(html, 'Selenium', decimal, prices.currency_for_domain(url)) if self.result_memo is not None else None
+            if memo_key:
+                cached = self.result_memo.get(memo_key)
+                if cached is not None:
+                    return cached
+                    
+            # Structured data (JSON-LD / microdata / OpenGraph) first
+            self.phase('structured_data')
+            product = structured_data.extract_product(html)
+            complete = structured_data.is_complete(product)
+            
+            # Try the new price extraction method first
+            self.phase('selectors')
+            if payload is not None:
+                original_price, current_price = browser_extraction.direct_prices(payload, decimal)
+            else:
+                original_price, current_price = self.extract_prices_selenium(driver, decimal)
+            if complete:
+                current_price = product['price']
+                original_price = product['original_price'] or original_price
+            
+            # If prices not found, fall back to the original selectors
+            if not current_price:
+                self.phase('xpath_fallback')
+                if payload is not None:
+                    current_price, original_price = browser_extraction.fallback_prices(payload, original_price, decimal)
+                else:
+                    current_price, original_price = self.fallback_prices_selenium(driver, original_price, decimal)
+                    
+            # Extract name
+            self.phase('name')
+            name = product['name'] if complete else None
+            if not name:
+                name = payload['name'] if payload is not None else self.extract_name_selenium(driver)
+                    
+            # Structured data fills whatever the selectors missed
+            name = name or product['name']
+            current_price = current_price or product['price']
+            if original_price and current_price and original_price <= current_price:
+                original_price = None
+                
+            currency = prices.normalize_currency(product['currency']) or prices.currency_in_markup(html)
+            result = self.price_result(name, current_price, original_price, currency, url)
+            if memo_key:
+                self.result_memo.put(memo_key, result)
+            return result
+            
+        except Exception as e:
+            self.log_message(f"Selenium Error: {str(e)}")
+            return error_result(e)
+        finally:
+            if 'driver' in locals():
+                self.phase('driver_release')
+                pool.release(driver)
+            self.phase(None)
+                
+    def extract_prices_playwright(self, page, decimal='.'):
+        """Extract original and discounted prices using Playwright"""
+        original_price = None
+        discounted_price = None
+
+        # Extract original price
+        for selector in extraction.CSS_ORIGINAL_PRICE_SELECTORS:
+            element = page.query_selector(selector)
+            if element:
+                original_price = self.clean_price(element.text_content(), decimal)
+                break
+
+        # Extract discounted price
+        for selector in extraction.CSS_DISCOUNTED_PRICE_SELECTORS:
+            element = page.query_selector(selector)
+            if element:
+                discounted_price = self.clean_price(element.text_content(), decimal)
+                break
+
+        return original_price, discounted_price
+
+    def fallback_prices_playwright(self, page, original_price, decimal='.'):
+        """(current_price, original_price) from the generic CSS selectors"""
+        current_price = None
+        # Find current price
+        for selector in extraction.BROWSER_PRICE_SELECTORS:
+            elements = page.query_selector_all(selector)
+            for element in elements:
+                text = element.text_content().strip()
+                if text and not any(word in text.lower() for word in extraction.BROWSER_WAS_KEYWORDS):
+                    price = self.clean_price(text, decimal)
+                    if price:
+                        current_price = price
+                        break
+            if current_price:
+                break
+        
+        # Find original price if not found yet
+        if not original_price:
+            for selector in extraction.BROWSER_WAS_PRICE_SELECTORS:
+                elements = page.query_selector_all(selector)
+                for element in elements:
+                    text = element.text_content().strip()
+                    if text and any(word in text.lower() for word in extraction.BROWSER_WAS_KEYWORDS):
+                        price = self.clean_price(text, decimal)
+                        if price and (not current_price or price > current_price):
+                            original_price = price
+                            break
+                if original_price:
+                    break
+        return current_price, original_price
+        
+    def extract_name_playwright(self, page):
+        """Product name from the first name selector that matches"""
+        for selector in extraction.NAME_SELECTORS:
+            element = page.query_selector(selector)
+            if element:
+                return element.text_content().strip()
+        return None
+
+    def get_playwright_pool(self):
+        """Return the shared sync Playwright browsers, creating the pool on first use"""
+        if self.playwright_pool is None:
+            self.playwright_pool = PlaywrightBrowserPool(
+                lambda playwright: playwright.chromium.launch(headless=True),
+                size=self.playwright_pool_size,
+                max_pages=self.playwright_max_pages
+            )
+        return self.playwright_pool
+        
+    @instrumented('Playwright')
+    @resilient
+    def scrape_with_playwright(self, url):
+        try:
+            # On this thread: a job from politeness.submit() has already paid for its slot here
+            self.phase('politeness_wait')
+            self.politeness.wait(url)
+            self.phase('launch')
+            return self.get_playwright_pool().run(self.scrape_playwright_page, url)
+        except Exception as e:
+            self.phase(None)
+            self.log_message(f"Playwright Error: {str(e)}")
+            return error_result(e)
+            
+    def scrape_playwright_page(self, browser, url):
+        """Scrape one URL in a fresh context of a pooled browser (runs on that browser's thread)"""
+        context = browser.new_context(
+            viewport={'width': 1920, 'height': 1080},
+            user_agent=self.get_random_user_agent(),
+            java_script_enabled=True,
+            ignore_https_errors=True
+        )
+        try:
+            if self.resource_blocker is not None:
+                self.resource_blocker.apply_playwright(context)
+            
+            page = context.new_page()
+            page = self.configure_playwright_stealth(page)
+            
+            wait_until = 'domcontentloaded' if self.wait_for_product else 'networkidle'
+            self.phase('navigation', wait_until=wait_until)
+            response = page.goto(url, wait_until=wait_until, timeout=30000)
+            if response is not None:
+                self.politeness.note_response(url, response.status, response.headers)
+            self.phase('wait_ready')
+            self.wait_for_product_playwright(page)
+            
+            # Add random scrolling
+            self.phase('scroll')
+            for _ in range(random.randint(3, 7) if self.human_scrolling else 0):
+                page.evaluate(f"window.scrollTo(0, {random.randint(100, 1000)})")
+                time.sleep(random.uniform(0.5, 1.5))
+                
+            self.phase('content')
+            payload = browser_extraction.playwright_payload(page) if self.batched_extraction else None
+            decimal = prices.decimal_for_domain(url)
+            html = payload['html'] if payload is not None else page.content()
+            self.annotate(bytes=len(html))
+            memo_key = self.result_memo.key(html, 'Playwright', decimal, prices.currency_for_domain(url)) if self.result_memo is not None else None
+            if memo_key:
+                cached = self.result_memo.get(memo_key)
+                if cached is not None:
+                    return cached
+                    
+            # Structured data (JSON-LD / microdata / OpenGraph) first
+            self.phase('structured_data')
+            product = structured_data.extract_product(html)
+            complete = structured_data.is_complete(product)
+            
+            # Try the new price extraction method first
+            self.phase('selectors')
+            if payload is not None:
+                original_price, current_price = browser_extraction.direct_prices(payload, decimal)
+            else:
+                original_price, current_price = self.extract_prices_playwright(page, decimal)
+            if complete:
+                current_price = product['price']
+                original_price = product['original_price'] or original_price
+            
+            # If prices not found, fall back to the original selectors
+            if not current_price:
+                self.phase('css_fallback')
+                if payload is not None:
+                    current_price, original_price = browser_extraction.fallback_prices(payload, original_price, decimal)
+                else:
+                    current_price, original_price = self.fallback_prices_playwright(page, original_price, decimal)
+                    
+            # Structured data fills whatever the selectors missed
+            current_price = current_price or product['price']
+            original_price = original_price or product['original_price']
+            if original_price and current_price and original_price <= current_price:
+                original_price = None
+                        
+            # Extract name
+            self.phase('name')
+            name = product['name'] if complete else None
+            if not name:
+                name = payload['name'] if payload is not None else self.extract_name_playwright(page)
+            name = name or product['name']
+                    
+            currency = prices.normalize_currency(product['currency']) or prices.currency_in_markup(html)
+                
+            self.phase('close')
+            result = self.price_result(name, current_price, original_price, currency, url)
+            if memo_key:
+                self.result_memo.put(memo_key, result)
+            return result
+        finally:
+            context.close()
@@ -0,0 +1,375 @@
+import hashlib
+import json
+import re
+from functools import lru_cache
+
+import soupsieve as sv
+from bs4 import Tag
+
+import prices
+
+# Current price selectors
+PRICE_SELECTORS = [
+    "[class*='price']:not([class*='was']):not([class*='old']):not([class*='regular'])",
+    "[class*='Price']:not([class*='Was']):not([class*='Old']):not([class*='Regular'])",
+    "[class*='current-price']",
+    "[class*='sale-price']",
+    "[class*='special-price']",
+    "[class*='offer-price']",
+    "[class*='price-value']",
+    "[class*='price__current']",
+    "[class*='price--sale']",
+    "[data-price]",
+    "[data-product-price]",
+    "[itemprop='price']"
+]
+
+# Original price selectors
+WAS_PRICE_SELECTORS = [
+    "[class*='was-price']",
+    "[class*='old-price']",
+    "[class*='regular-price']",
+    "[class*='list-price']",
+    "[class*='compare-price']",
+    "[class*='original-price']",
+    "[class*='price--compare']",
+    "[class*='price__regular']",
+    "[class*='price__was']",
+    "[data-regular-price]",
+    "[data-compare-price]"
+]
+
+# Product name selectors
+NAME_SELECTORS = [
+    "[class*='product-title']",
+    "[class*='product-name']",
+    "h1",
+    "[class*='title']",
+    "[class*='name']",
+    "[itemprop='name']"
+]
+
+# Words marking a price as a previous / reference price
+WAS_KEYWORDS = ['was', 'old', 'msrp', 'regular', 'retail', 'list']
+
+# Browser engines: site-specific selectors tried before the generic ones
+XPATH_ORIGINAL_PRICE_SELECTORS = [
+    "//*[contains(@class, 'price--old')]",
+    "//*[contains(@class, 'price--regular')]",
+    "//*[contains(@class, 'price--compare')]",
+    "//*[contains(@class, 'price--was')]",
+    # Specific website selectors
+    "//*[@class='price text-dark-gray text-xl font-sans font-light line-through']"
+]
+XPATH_DISCOUNTED_PRICE_SELECTORS = [
+    "//*[contains(@class, 'price--current')]",
+    "//*[contains(@class, 'price--sale')]",
+    "//*[contains(@class, 'price--special')]",
+    "//*[contains(@class, 'price--discounted')]",
+    # Specific website selectors
+    "//*[@class='price text-darkpink-900 text-22 font-semibold font-sans leading-9 lg:text-4xl']"
+]
+CSS_ORIGINAL_PRICE_SELECTORS = [
+    ".price--old", ".price--regular", ".price--compare", ".price--was",
+    # Specific website selectors
+    ".price.text-dark-gray.text-xl.font-sans.font-light.line-through"
+]
+CSS_DISCOUNTED_PRICE_SELECTORS = [
+    ".price--current", ".price--sale", ".price--special", ".price--discounted",
+    # Specific website selectors
+    ".price.text-darkpink-900.text-22.font-semibold.font-sans.leading-9.lg\\:text-4xl"
+]
+
+# Browser engines: generic fallbacks
+XPATH_PRICE_SELECTORS = [
+    "//*[contains(@class, 'price') and not(contains(@class, 'was')) and not(contains(@class, 'old'))]",
+    "//*[contains(@class, 'current-price')]",
+    "//*[contains(@class, 'sale-price')]",
+    "//*[contains(@class, 'special-price')]",
+    "//*[@data-price]",
+    "//*[@itemprop='price']"
+]
+XPATH_WAS_PRICE_SELECTORS = [
+    "//*[contains(@class, 'was-price')]",
+    "//*[contains(@class, 'old-price')]",
+    "//*[contains(@class, 'regular-price')]",
+    "//*[contains(@class, 'compare-price')]",
+    "//*[@data-regular-price]",
+    "//*[@data-compare-price]"
+]
+XPATH_NAME_SELECTORS = [
+    "//*[contains(@class, 'product-title')]",
+    "//*[contains(@class, 'product-name')]",
+    "//h1",
+    "//*[contains(@class, 'title')]",
+    "//*[contains(@class, 'name')]",
+    "//*[@itemprop='name']"
+]
+BROWSER_PRICE_SELECTORS = [
+    "[class*='price']:not([class*='was']):not([class*='old']):not([class*='regular'])",
+    "[class*='current-price']",
+    "[class*='sale-price']",
+    "[class*='special-price']",
+    "[data-price]",
+    "[itemprop='price']"
+]
+BROWSER_WAS_PRICE_SELECTORS = [
+    "[class*='was-price']",
+    "[class*='old-price']",
+    "[class*='regular-price']",
+    "[class*='compare-price']",
+    "[data-regular-price]",
+    "[data-compare-price]"
+]
+# The browser fallback loops use a shorter keyword list than the static engines
+BROWSER_WAS_KEYWORDS = ['was', 'old', 'msrp', 'regular']
+
+# Bump when extraction logic changes in a way the selector lists above don't show
+EXTRACTOR_VERSION = 4
+
+# One attribute test: [attr], [attr='v'], [attr*='v'], [attr^='v'], [attr$='v'], optionally inside :not(...)
+ATTRIBUTE_TEST = re.compile(
+    r"""(?P<negate>:not\()?\[(?P<attr>[a-z][\w-]*)(?:(?P<op>[*^$]?=)(?P<quote>['"])(?P<value>[^'"]*)(?P=quote))?\](?(negate)\))"""
+)
+TAG_NAME = re.compile(r"[a-z][a-z0-9]*")
+
+
+def clean_price(price_text, decimal='.'):
+    """Clean and validate price text (`decimal` is the site's decimal separator)"""
+    if not isinstance(price_text, str):
+        return None
+    return prices.parse_price(price_text, decimal)
+
+
+def extractor_fingerprint():
+    """Short hash of every selector list and EXTRACTOR_VERSION (memoized results are keyed by it)"""
+    lists = [EXTRACTOR_VERSION, PRICE_SELECTORS, WAS_PRICE_SELECTORS, NAME_SELECTORS, WAS_KEYWORDS,
+             XPATH_ORIGINAL_PRICE_SELECTORS, XPATH_DISCOUNTED_PRICE_SELECTORS,
+             CSS_ORIGINAL_PRICE_SELECTORS, CSS_DISCOUNTED_PRICE_SELECTORS,
+             XPATH_PRICE_SELECTORS, XPATH_WAS_PRICE_SELECTORS, XPATH_NAME_SELECTORS,
+             BROWSER_PRICE_SELECTORS, BROWSER_WAS_PRICE_SELECTORS, BROWSER_WAS_KEYWORDS]
+    return hashlib.blake2b(json.dumps(lists).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def attribute_value(element, attr):
+    """Attribute as CSS sees it (multi-valued attributes joined by spaces)"""
+    value = element.attrs.get(attr)
+    if isinstance(value, list):
+        return ' '.join(value)
+    return value
+
+
+def compile_simple_selector(selector):
+    """Compile tag / attribute-test selectors to a plain Python predicate
+
+    Returns (predicate, tag, attrs) where tag and attrs are what an element
+    must have for the predicate to possibly match, or None when the selector
+    uses anything else (those go through soupsieve).
+    """
+    tag = None
+    position = 0
+    match = TAG_NAME.match(selector)
+    if match:
+        tag = match.group()
+        position = match.end()
+    tests = []
+    while position < len(selector):
+        match = ATTRIBUTE_TEST.match(selector, position)
+        # 'type' values are case-insensitive in HTML; leave those to soupsieve
+        if not match or match.group('attr') == 'type':
+            return None
+        tests.append((bool(match.group('negate')), match.group('attr'), match.group('op'), match.group('value')))
+        position = match.end()
+    if tag is None and not tests:
+        return None
+
+    def predicate(element):
+        if tag is not None and element.name != tag:
+            return False
+        for negate, attr, op, value in tests:
+            actual = attribute_value(element, attr)
+            if actual is None:
+                found = False
+            elif op is None:
+                found = True
+            elif op == '=':
+                found = actual == value
+            elif op == '*=':
+                found = bool(value) and value in actual
+            elif op == '^=':
+                found = bool(value) and actual.startswith(value)
+            else:
+                found = bool(value) and actual.endswith(value)
+            if found == negate:
+                return False
+        return True
+
+    attrs = {attr for negate, attr, op, value in tests if not negate}
+    return predicate, tag, attrs
+
+
+class ExtractionPlan:
+    """Precompiled price / was-price / name selectors evaluated in one DOM pass
+
+    Gives the same answers as running soup.select for every selector in
+    turn: the first selector (in list order) that has a qualifying element
+    wins, and within a selector the first qualifying element in document
+    order wins. Each element's text is read and cleaned at most once.
+    """
+
+    def __init__(self, price_selectors, was_price_selectors, name_selectors=()):
+        self.price_selectors = list(price_selectors)
+        self.was_price_selectors = list(was_price_selectors)
+        self.name_selectors = list(name_selectors)
+        self.price_tests = [self.compile(s) for s in self.price_selectors]
+        self.was_tests = [self.compile(s) for s in self.was_price_selectors]
+        self.name_tests = [self.compile(s) for s in self.name_selectors]
+
+        # Elements with none of these tags / attributes cannot match any selector
+        self.filter_tags = set()
+        self.filter_attrs = set()
+        self.needs_all = False
+        for test in self.price_tests + self.was_tests + self.name_tests:
+            compiled = test[1]
+            if compiled is None or (compiled[1] is None and not compiled[2]):
+                self.needs_all = True
+            else:
+                if compiled[1] is not None:
+                    self.filter_tags.add(compiled[1])
+                else:
+                    self.filter_attrs |= compiled[2]
+
+    def compile(self, selector):
+        compiled = compile_simple_selector(selector)
+        if compiled is not None:
+            return compiled[0], compiled
+        pattern = sv.compile(selector)
+
+        def match(element):
+            # Non-bs4 trees (parsers.SelectolaxElement) match with their own engine
+            if isinstance(element, Tag):
+                return pattern.match(element)
+            return element.match_selector(selector)
+        return match, None
+
+    def candidate(self, element):
+        if self.needs_all or element.name in self.filter_tags:
+            return True
+        attrs = element.attrs
+        return any(attr in attrs for attr in self.filter_attrs)
+
+    def run(self, soup, known_price=None, decimal='.'):
+        """Return (current_price, original_price, name) for a parsed document
+
+        With known_price (e.g. from structured data) the price selectors are
+        skipped and was-prices are judged against it. Price texts are read
+        with the site's `decimal` separator.
+        """
+        texts = {}
+
+        def text_info(element):
+            key = id(element)
+            if key not in texts:
+                text = element.get_text().lower()
+                is_was = any(word in text for word in WAS_KEYWORDS)
+                # Holding the element keeps its id from being reused by a wrapper object
+                texts[key] = (is_was, clean_price(text, decimal), element)
+            return texts[key][:2]
+
+        best_current = len(self.price_tests)
+        current_price = None
+        if known_price:
+            best_current = 0
+            current_price = known_price
+        # Until the current price is final, every was-price candidate has to be kept
+        was_candidates = [[] for _ in self.was_tests]
+        best_was = len(self.was_tests)
+        names = [None] * len(self.name_tests)
+        best_name = len(self.name_tests)
+
+        for element in soup.find_all(True):
+            if not self.candidate(element):
+                continue
+            # Current price: only selectors ranked above the best hit so far matter
+            for index in range(best_current):
+                if self.price_tests[index][0](element):
+                    is_was, price = text_info(element)
+                    if not is_was and price:
+                        current_price = price
+                        best_current = index
+                        break
+            current_final = best_current == 0
+            # Original price: once the current price is final, only better-ranked hits matter
+            for index in range(best_was):
+                if self.was_tests[index][0](element):
+                    is_was, price = text_info(element)
+                    if is_was and price:
+                        was_candidates[index].append(price)
+                        if current_final and (not current_price or price > current_price):
+                            best_was = index
+                            break
+            # Name: first element of the best-ranked selector
+            for index in range(best_name):
+                if self.name_tests[index][0](element):
+                    names[index] = element
+                    best_name = index
+                    break
+            # Nothing later in the document can change the answer
+            if current_final and best_was == 0 and best_name == 0:
+                break
+
+        original_price = None
+        for candidates in was_candidates:
+            for price in candidates:
+                if not current_price or price > current_price:
+                    original_price = price
+                    break
+            if original_price:
+                break
+
+        name = None
+        if best_name < len(names):
+            name = names[best_name].get_text().strip()
+        return current_price, original_price, name
+
+
+def selector_literals(selectors):
+    """Strings at least one of which must appear in the markup for any selector to match"""
+    literals = set()
+    for selector in selectors:
+        compiled = compile_simple_selector(selector)
+        if compiled is None:
+            return None
+        predicate, tag, attrs = compiled
+        positive = [m for m in ATTRIBUTE_TEST.finditer(selector) if not m.group('negate')]
+        if tag is not None:
+            literals.add('<' + tag)
+        elif positive:
+            # Attribute values are the rarer string; fall back to the attribute name
+            test = positive[0]
+            literals.add(test.group('value') if test.group('op') and test.group('value') else test.group('attr'))
+        else:
+            return None
+    return [literal.lower() for literal in literals]
+
+
+def has_was_price_markup(html):
+    """Cheap pre-check: can any was-price selector possibly match this page?"""
+    if WAS_PRICE_LITERALS is None:
+        return True
+    if isinstance(html, bytes):
+        lowered = html.lower()
+        return any(literal.encode() in lowered for literal in WAS_PRICE_LITERALS)
+    lowered = html.lower()
+    return any(literal in lowered for literal in WAS_PRICE_LITERALS)
+
+
+@lru_cache(maxsize=32)
+def compiled_plan(price_selectors, was_price_selectors, name_selectors=()):
+    """Compile once per distinct selector set (arguments must be tuples)"""
+    return ExtractionPlan(price_selectors, was_price_selectors, name_selectors)
+
+
+DEFAULT_PLAN = compiled_plan(tuple(PRICE_SELECTORS), tuple(WAS_PRICE_SELECTORS), tuple(NAME_SELECTORS))
+WAS_PRICE_PLAN = compiled_plan((), tuple(WAS_PRICE_SELECTORS))
+WAS_PRICE_LITERALS = selector_literals(WAS_PRICE_SELECTORS)
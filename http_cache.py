@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that never change the page content
+TRACKING_PARAMS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+                   'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url):
+    """Cache key: lowercase scheme/host, no default port, fragment or tracking params, sorted query"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k.lower() not in TRACKING_PARAMS)
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+class HttpCache:
+    """Persistent HTTP cache with conditional revalidation
+
+    One SQLite file holds, per normalized URL, the zlib-compressed body, the
+    ETag / Last-Modified validators and the extraction result. Entries
+    younger than `ttl` seconds are served without a request; older ones are
+    revalidated with If-None-Match / If-Modified-Since, and a 304 reuses the
+    stored result. Least recently used entries are evicted once the stored
+    bodies exceed `max_bytes`.
+    """
+
+    def __init__(self, directory, ttl=0, max_bytes=256 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, 'http_cache.sqlite3')
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                body BLOB,
+                size INTEGER NOT NULL,
+                result TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self.db.commit()
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, url):
+        """Cached entry for a URL, or None"""
+        key = normalize_url(url)
+        try:
+            with self.lock:
+                row = self.db.execute(
+                    "SELECT etag, last_modified, content_type, body, result, fetched_at FROM entries WHERE url = ?",
+                    (key,)).fetchone()
+                if row is None:
+                    return None
+                self.db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), key))
+                self.db.commit()
+        except sqlite3.Error as e:
+            logger.warning("HTTP cache read failed: %s", e)
+            return None
+        etag, last_modified, content_type, body, result, fetched_at = row
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_type': content_type,
+            'body': body,
+            'result': json.loads(result) if result else None,
+            'fetched_at': fetched_at,
+        }
+
+    def body(self, entry):
+        return zlib.decompress(entry['body']) if entry and entry['body'] else None
+
+    def is_fresh(self, entry):
+        return bool(entry) and self.ttl > 0 and time.time() - entry['fetched_at'] < self.ttl
+
+    def conditional_headers(self, entry):
+        """Validators to send on a repeat fetch"""
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def cacheable(self, headers):
+        return 'no-store' not in (headers.get('Cache-Control') or '').lower()
+
+    def store(self, url, headers, body, result=None):
+        """Save a 200 response and the result extracted from it
+
+        body None keeps only the result (a partial download must never be
+        re-parsed as the whole page after a 304).
+        """
+        if not self.cacheable(headers) or (body is None and not result):
+            return
+        key = normalize_url(url)
+        compressed = zlib.compress(body, 6) if body is not None else b''
+        now = time.time()
+        try:
+            with self.lock:
+                old = self.db.execute("SELECT size FROM entries WHERE url = ?", (key,)).fetchone()
+                self.db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, headers.get('ETag'), headers.get('Last-Modified'), headers.get('Content-Type'),
+                     compressed, len(compressed), json.dumps(result) if result else None, now, now))
+                self.total_bytes += len(compressed) - (old[0] if old else 0)
+                self.evict()
+                self.db.commit()
+        except sqlite3.Error as e:
+            logger.warning("HTTP cache write failed: %s", e)
+
+    def mark_revalidated(self, url, headers):
+        """A 304 came back: the entry is fresh again (validators may be updated)"""
+        key = normalize_url(url)
+        try:
+            with self.lock:
+                self.db.execute(
+                    "UPDATE entries SET fetched_at = ?, etag = COALESCE(?, etag), "
+                    "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                    (time.time(), headers.get('ETag'), headers.get('Last-Modified'), key))
+                self.db.commit()
+        except sqlite3.Error as e:
+            logger.warning("HTTP cache update failed: %s", e)
+
+    def store_result(self, url, result):
+        """Attach (or replace) the extraction result of a cached body"""
+        try:
+            with self.lock:
+                self.db.execute("UPDATE entries SET result = ? WHERE url = ?",
+                                (json.dumps(result), normalize_url(url)))
+                self.db.commit()
+        except sqlite3.Error as e:
+            logger.warning("HTTP cache update failed: %s", e)
+
+    def evict(self):
+        """Drop least recently used entries until the bodies fit in max_bytes (lock held)"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        rows = self.db.execute("SELECT url, size FROM entries ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            self.db.execute("DELETE FROM entries WHERE url = ?", (key,))
+            self.total_bytes -= size
+
+    def close(self):
+        with self.lock:
+            self.db.close()
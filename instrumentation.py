@@ -0,0 +1,287 @@
+import bisect
+import contextvars
+import functools
+import importlib.util
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tiering import domain_of
+
+logger = logging.getLogger(__name__)
+
+OPENTELEMETRY_AVAILABLE = importlib.util.find_spec('opentelemetry') is not None
+
+# Upper bounds of the histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Root span of the scrape running in this thread / task
+CURRENT_SPAN = contextvars.ContextVar('scrape_span', default=None)
+
+
+class Span:
+    """One timed operation: a whole scrape, or a phase inside it"""
+
+    __slots__ = ('name', 'attributes', 'parent', 'start', 'end', 'start_ns', 'end_ns', 'phase', 'exported')
+
+    def __init__(self, name, attributes, parent=None):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.start_ns = time.time_ns()
+        self.end = None
+        self.end_ns = None
+        # Open phase of a root span
+        self.phase = None
+        # Set by an exporter, e.g. the OpenTelemetry span mirroring this one
+        self.exported = None
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def finish(self):
+        self.end = time.perf_counter()
+        self.end_ns = self.start_ns + int((self.end - self.start) * 1e9)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        for label_values, value in self.values.items():
+            yield self.name, label_values, value
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [count per bucket..., +Inf count, sum]
+        self.values = {}
+
+    def observe(self, label_values, value):
+        counts = self.values.get(label_values)
+        if counts is None:
+            counts = self.values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self):
+        for label_values, counts in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", label_values + (('le', str(bound)),), cumulative
+            yield f"{self.name}_count", label_values, cumulative
+            yield f"{self.name}_sum", label_values, counts[-1]
+
+
+class Metrics:
+    """Scrape counters and histograms in the Prometheus text format"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.results = Counter('scrape_results_total', "Scrapes by engine, domain and final status",
+                               ('engine', 'domain', 'status'))
+        self.latency = Histogram('scrape_duration_seconds', "Wall time of a scrape, retries included",
+                                 ('engine', 'domain'), LATENCY_BUCKETS)
+        self.phases = Histogram('scrape_phase_seconds', "Wall time of each phase of a scrape",
+                                ('engine', 'phase'), LATENCY_BUCKETS)
+        self.page_bytes = Histogram('scrape_page_bytes', "Size of the fetched / rendered page",
+                                    ('engine', 'domain'), BYTES_BUCKETS)
+        self.families = [self.results, self.latency, self.phases, self.page_bytes]
+        self.server = None
+
+    def record_phase(self, engine, phase, seconds):
+        with self.lock:
+            self.phases.observe((('engine', engine), ('phase', phase)), seconds)
+
+    def record_scrape(self, engine, url, status, seconds, page_bytes=None):
+        labels = (('engine', engine), ('domain', domain_of(url)))
+        with self.lock:
+            self.results.inc(labels + (('status', status),))
+            self.latency.observe(labels, seconds)
+            if page_bytes is not None:
+                self.page_bytes.observe(labels, page_bytes)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for family in self.families:
+                kind = 'counter' if isinstance(family, Counter) else 'histogram'
+                lines.append(f"# HELP {family.name} {family.help_text}")
+                lines.append(f"# TYPE {family.name} {kind}")
+                for name, labels, value in family.samples():
+                    label_text = ','.join(f'{k}="{escape_label(v)}"' for k, v in labels)
+                    lines.append(f"{name}{{{label_text}}} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='127.0.0.1'):
+        """Expose GET /metrics on a background thread"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        logger.info("Serving metrics on http://%s:%d/metrics", host, self.server.server_address[1])
+        return self.server.server_address[1]
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class LogExporter:
+    """Logs every finished span at DEBUG"""
+
+    def on_start(self, span):
+        pass
+
+    def on_end(self, span):
+        logger.debug("%s%s %.1fms %s", '  ' if span.parent else '', span.name, span.duration * 1000,
+                     span.attributes)
+
+
+class OpenTelemetryExporter:
+    """Mirrors spans into OpenTelemetry; the application configures the SDK / OTLP exporter"""
+
+    def __init__(self, tracer=None):
+        # Imported here: opentelemetry is optional
+        from opentelemetry import trace
+        self.trace = trace
+        self.tracer = tracer or trace.get_tracer('scraper')
+
+    def on_start(self, span):
+        parent = span.parent.exported if span.parent is not None else None
+        context = self.trace.set_span_in_context(parent) if parent is not None else None
+        span.exported = self.tracer.start_span(span.name, context=context, start_time=span.start_ns,
+                                               attributes=otel_attributes(span.attributes))
+
+    def on_end(self, span):
+        if span.exported is not None:
+            span.exported.set_attributes(otel_attributes(span.attributes))
+            span.exported.end(end_time=span.end_ns)
+
+
+def otel_attributes(attributes):
+    return {k: v for k, v in attributes.items() if isinstance(v, (str, bool, int, float))}
+
+
+class Telemetry:
+    """Spans around each scrape and its phases, feeding metrics and span exporters
+
+    Engines hold one of these in `telemetry` (None disables everything at
+    the cost of one attribute check per phase). A scrape is a root span;
+    ScraperEngine.phase() closes the running phase and opens the next, so
+    phases tile the scrape without re-indenting the engine code.
+    """
+
+    def __init__(self, metrics=None, exporters=()):
+        self.metrics = metrics
+        self.exporters = list(exporters)
+
+    def start_span(self, name, attributes, parent=None):
+        span = Span(name, attributes, parent)
+        for exporter in self.exporters:
+            exporter.on_start(span)
+        return span
+
+    def end_span(self, span):
+        span.finish()
+        for exporter in self.exporters:
+            try:
+                exporter.on_end(span)
+            except Exception as e:
+                logger.debug("Span exporter failed: %s", e)
+
+    def phase(self, name, **attributes):
+        """End the current phase of the running scrape and start `name`"""
+        root = CURRENT_SPAN.get()
+        if root is None:
+            return
+        self.end_phase(root)
+        if name is not None:
+            root.phase = self.start_span(name, attributes, root)
+
+    def end_phase(self, root):
+        phase, root.phase = root.phase, None
+        if phase is None:
+            return
+        self.end_span(phase)
+        if self.metrics is not None:
+            self.metrics.record_phase(root.attributes['engine'], phase.name, phase.duration)
+
+    def annotate(self, **attributes):
+        root = CURRENT_SPAN.get()
+        if root is not None:
+            root.attributes.update(attributes)
+
+    def begin(self, engine, url):
+        root = self.start_span('scrape', {'engine': engine, 'url': url, 'domain': domain_of(url)})
+        return root, CURRENT_SPAN.set(root)
+
+    def finish(self, root, token, result):
+        self.end_phase(root)
+        CURRENT_SPAN.reset(token)
+        status = (result or {}).get('status', 'error')
+        root.attributes['status'] = status
+        self.end_span(root)
+        if self.metrics is not None:
+            self.metrics.record_scrape(root.attributes['engine'], root.attributes['url'], status, root.duration,
+                                       root.attributes.get('bytes'))
+
+    def close(self):
+        if self.metrics is not None:
+            self.metrics.close()
+
+
+def instrumented(engine):
+    """Trace an engine method (self, url) -> result as one `scrape` span when self.telemetry is set"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, url):
+            telemetry = self.telemetry
+            if telemetry is None:
+                return method(self, url)
+            root, token = telemetry.begin(engine, url)
+            result = None
+            try:
+                result = method(self, url)
+                return result
+            finally:
+                telemetry.finish(root, token, result)
+        return wrapper
+    return decorate
@@ -0,0 +1,130 @@
+import logging
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Resource types (Playwright request.resource_type names) that never carry prices
+DEFAULT_DENY_TYPES = ('image', 'media', 'font')
+
+# Analytics, ads and tag managers commonly found on retail pages
+DEFAULT_DENY_DOMAINS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googleadservices.com',
+    'googlesyndication.com',
+    'doubleclick.net',
+    'facebook.net',
+    'hotjar.com',
+    'clarity.ms',
+    'bing.com',
+    'tiktok.com',
+    'pinterest.com',
+    'snapchat.com',
+    'criteo.com',
+    'criteo.net',
+    'taboola.com',
+    'outbrain.com',
+    'klaviyo.com',
+    'trustpilot.com',
+    'yotpo.com',
+    'newrelic.com',
+    'nr-data.net',
+    'sentry.io',
+)
+
+# File extensions per resource type, used where only URL patterns can be blocked (CDP)
+TYPE_EXTENSIONS = {
+    'image': ('png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp'),
+    'media': ('mp4', 'webm', 'ogg', 'mp3', 'wav', 'm4a', 'mov'),
+    'font': ('woff', 'woff2', 'ttf', 'otf', 'eot'),
+    'stylesheet': ('css',),
+}
+
+# A page is ready to extract once any of these is in the DOM
+PRODUCT_READY_SELECTOR = ", ".join([
+    "script[type='application/ld+json']",
+    "meta[property='product:price:amount']",
+    "meta[property='og:price:amount']",
+    "[itemprop='price']",
+    "[data-price]",
+    "[data-product-price]",
+    "[class*='price']",
+])
+
+
+class ResourceBlocker:
+    """Allow/deny rules for browser sub-resources, by resource type and domain
+
+    allow_domains always wins over the deny rules, so a CDN that serves
+    product data can be let through while other images stay blocked.
+    """
+
+    def __init__(self, deny_types=DEFAULT_DENY_TYPES, deny_domains=DEFAULT_DENY_DOMAINS, allow_domains=()):
+        self.deny_types = set(deny_types)
+        self.deny_domains = tuple(d.lower() for d in deny_domains)
+        self.allow_domains = tuple(d.lower() for d in allow_domains)
+        self.blocked = 0
+
+    def host_matches(self, host, domains):
+        return any(host == d or host.endswith('.' + d) for d in domains)
+
+    def should_block(self, resource_type, url):
+        """Decide for one request; the main document is never blocked"""
+        if resource_type == 'document':
+            return False
+        host = (urlparse(url).hostname or '').lower()
+        if self.allow_domains and self.host_matches(host, self.allow_domains):
+            return False
+        if resource_type in self.deny_types or self.host_matches(host, self.deny_domains):
+            self.blocked += 1
+            return True
+        return False
+
+    # Playwright (page.route / context.route)
+
+    def apply_playwright(self, target):
+        """Install the rules on a sync-API page or context"""
+        def handle(route):
+            request = route.request
+            if self.should_block(request.resource_type, request.url):
+                route.abort()
+            else:
+                route.continue_()
+        target.route("**/*", handle)
+
+    async def apply_playwright_async(self, target):
+        """Install the rules on an async-API page or context"""
+        async def handle(route):
+            request = route.request
+            if self.should_block(request.resource_type, request.url):
+                await route.abort()
+            else:
+                await route.continue_()
+        await target.route("**/*", handle)
+
+    # Selenium (Chrome DevTools Protocol)
+
+    def blocked_url_patterns(self):
+        """CDP can only block by URL pattern, so types map to file extensions
+
+        allow_domains can only exempt deny_domains here, not resource types.
+        """
+        patterns = []
+        for resource_type in sorted(self.deny_types):
+            for extension in TYPE_EXTENSIONS.get(resource_type, ()):
+                patterns.append(f"*.{extension}")
+                patterns.append(f"*.{extension}?*")
+        for domain in self.deny_domains:
+            if not self.host_matches(domain, self.allow_domains):
+                patterns.append(f"*://{domain}/*")
+                patterns.append(f"*://*.{domain}/*")
+        return patterns
+
+    def apply_selenium(self, driver):
+        """Install the rules on a Chrome driver; lasts for the driver's lifetime"""
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_url_patterns()})
+        except Exception as e:
+            # Non-Chromium drivers have no CDP; scrape without blocking
+            logger.info("Resource blocking unavailable: %s", e)
@@ -0,0 +1,143 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import extraction
+import parsers
+import prices
+import structured_data
+
+logger = logging.getLogger(__name__)
+
+# Imported once in the fork server, so every worker starts with them loaded
+PRELOAD_MODULES = ['parse_workers', 'extraction', 'prices', 'structured_data', 'parsers', 'bs4', 'soupsieve']
+
+# Set in each worker by init_worker
+WORKER_BACKEND = None
+
+
+def extract_record(html, content_type=None, product=None, parser_backend=None, decimal='.'):
+    """(name, current_price, original_price, currency) of a page, prices as floats
+
+    The CPU-bound core of ScraperEngine.parse_with_bs, kept free of app state
+    so it can run in a worker process. `decimal` is the site's decimal
+    separator (prices.decimal_for_domain).
+    """
+    # Structured data first (JSON-LD / microdata / OpenGraph, no DOM needed)
+    if product is None:
+        product = structured_data.extract_product(html, content_type)
+
+    if structured_data.is_complete(product):
+        current_price, original_price, name = product['price'], product['original_price'], product['name']
+        # Only build the DOM when the page has was-price markup to look at
+        if not original_price and extraction.has_was_price_markup(html):
+            soup = parsers.parse_document(html, backend=parser_backend, content_type=content_type)
+            _, original_price, _ = extraction.WAS_PRICE_PLAN.run(soup, known_price=current_price, decimal=decimal)
+        return name, current_price, original_price, page_currency(html, product, content_type)
+
+    soup = parsers.parse_document(html, backend=parser_backend, content_type=content_type)
+
+    # Extract prices and name in a single pass over the document
+    trusted_price = product['price'] if product['price_source'] in ('json-ld', 'microdata') else None
+    current_price, original_price, name = extraction.DEFAULT_PLAN.run(soup, known_price=trusted_price, decimal=decimal)
+
+    # Structured data fills whatever the selectors missed
+    name = name or product['name']
+    current_price = current_price or product['price']
+    if not original_price and current_price and (product['original_price'] or 0) > current_price:
+        original_price = product['original_price']
+    return name, current_price, original_price, page_currency(html, product, content_type)
+
+
+def page_currency(html, product, content_type=None):
+    """ISO code the page prices in: declared in structured data, else the sign its prices carry"""
+    currency = prices.normalize_currency(product['currency'])
+    if currency:
+        return currency
+    # The sign scan reads UTF-8; other encodings are decoded first
+    if isinstance(html, bytes):
+        encoding = parsers.detect_encoding(html, content_type)
+        if encoding != 'utf-8':
+            html = html.decode(encoding, errors='replace')
+    return prices.currency_in_markup(html)
+
+
+def init_worker(parser_backend):
+    global WORKER_BACKEND
+    WORKER_BACKEND = parser_backend
+    if parser_backend == 'selectolax':
+        from selectolax.lexbor import LexborHTMLParser  # noqa: F401
+
+
+def parse_in_worker(html, content_type, product, decimal):
+    return extract_record(html, content_type, product, WORKER_BACKEND, decimal)
+
+
+def warm_up_worker(delay):
+    # Long enough that each warm-up call lands on a different process
+    time.sleep(delay)
+    return os.getpid()
+
+
+class ParseWorkerPool:
+    """Process pool that runs extract_record off the GIL
+
+    Fetch threads / coroutines hand raw bytes to parse(); a worker returns
+    the compact (name, current_price, original_price, currency) record. Workers fork
+    from a server that already imported the extraction modules, all start
+    up front, and each is replaced after max_tasks_per_child pages so
+    parser memory growth stays bounded.
+    """
+
+    def __init__(self, workers=None, max_tasks_per_child=500, parser_backend=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_tasks_per_child = max_tasks_per_child
+        self.parser_backend = parser_backend or parsers.DEFAULT_BACKEND
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = self.create_executor()
+        return self
+
+    def create_executor(self):
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(PRELOAD_MODULES)
+        else:
+            context = multiprocessing.get_context('spawn')
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(self.parser_backend,),
+            max_tasks_per_child=self.max_tasks_per_child
+        )
+        started = set(executor.map(warm_up_worker, [0.05] * self.workers))
+        logger.info("Started %d parse workers", len(started))
+        return executor
+
+    def submit(self, html, content_type=None, product=None, decimal='.'):
+        """Queue a page; returns a Future of its record"""
+        self.start()
+        return self.executor.submit(parse_in_worker, html, content_type, product, decimal)
+
+    def parse(self, html, content_type=None, product=None, decimal='.'):
+        return self.submit(html, content_type, product, decimal).result()
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -0,0 +1,228 @@
+import argparse
+import codecs
+import importlib.util
+import json
+import re
+import sys
+
+from bs4 import BeautifulSoup
+
+LXML_AVAILABLE = importlib.util.find_spec('lxml') is not None
+SELECTOLAX_AVAILABLE = importlib.util.find_spec('selectolax') is not None
+BACKENDS = ['html.parser', 'lxml', 'selectolax']
+# Backends repair badly nested markup differently, so switching is opt-in:
+# run `python parsers.py saved_pages/*.html` first to confirm parity
+DEFAULT_BACKEND = 'html.parser'
+
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+CHARSET_HEADER = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+CHARSET_META = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.I)
+
+# Text inside these never counts as visible text (matches BeautifulSoup's get_text)
+NON_TEXT_TAGS = ('script', 'style', 'template')
+
+
+def available_backends():
+    return [b for b in BACKENDS
+            if (b != 'lxml' or LXML_AVAILABLE) and (b != 'selectolax' or SELECTOLAX_AVAILABLE)]
+
+
+def detect_encoding(body, content_type=None):
+    """Pick the document encoding once: BOM, then HTTP charset, then <meta charset>"""
+    for bom, encoding in BOMS:
+        if body.startswith(bom):
+            return encoding
+    match = CHARSET_HEADER.search(content_type or '')
+    if match:
+        return normalize_encoding(match.group(1))
+    match = CHARSET_META.search(body[:4096])
+    if match:
+        return normalize_encoding(match.group(1).decode('ascii', 'ignore'))
+    try:
+        body[:65536].decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut at the sniff boundary is still UTF-8
+        if e.start < 65536 - 4:
+            return 'windows-1252'
+    return 'utf-8'
+
+
+def normalize_encoding(name):
+    try:
+        name = codecs.lookup(name).name
+    except LookupError:
+        return 'utf-8'
+    # Browsers treat latin-1 labels as windows-1252
+    return 'windows-1252' if name in ('latin-1', 'iso8859-1', 'ascii') else name
+
+
+def parse_document(html, backend=None, encoding=None, content_type=None):
+    """Parse str or bytes into a BeautifulSoup-compatible document
+
+    Bytes are parsed directly with the encoding detected once up front,
+    instead of decoding the whole body to text first.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if isinstance(html, bytes) and encoding is None:
+        encoding = detect_encoding(html, content_type)
+    if backend == 'selectolax':
+        if isinstance(html, bytes):
+            html = html.decode(encoding, errors='replace')
+        return SelectolaxDocument(html)
+    if backend not in ('lxml', 'html.parser'):
+        raise ValueError(f"Unknown parser backend: {backend}")
+    if isinstance(html, bytes):
+        return BeautifulSoup(html, backend, from_encoding=encoding)
+    return BeautifulSoup(html, backend)
+
+
+class SelectolaxElement:
+    """The slice of the bs4.Tag API the extractors use, over a lexbor node"""
+
+    __slots__ = ('node', 'name', 'attrs')
+
+    def __init__(self, node):
+        self.node = node
+        self.name = node.tag
+        # Valueless attributes come back as None; bs4 reports them as ''
+        self.attrs = {k: ('' if v is None else v) for k, v in node.attributes.items()}
+
+    def get(self, attr, default=None):
+        return self.attrs.get(attr, default)
+
+    def __getitem__(self, attr):
+        return self.attrs[attr]
+
+    @property
+    def string(self):
+        return self.node.text(deep=True)
+
+    def get_text(self):
+        node = self.node
+        if node.css_first(', '.join(NON_TEXT_TAGS)) is None:
+            return node.text(deep=True)
+        parts = []
+        for child in node.traverse(include_text=True):
+            if child.tag == '-text' and not self.inside_non_text(child):
+                parts.append(child.text_content or '')
+        return ''.join(parts)
+
+    def inside_non_text(self, child):
+        parent = child.parent
+        while parent is not None and parent.mem_id != self.node.mem_id:
+            if parent.tag in NON_TEXT_TAGS:
+                return True
+            parent = parent.parent
+        return False
+
+    def match_selector(self, selector):
+        return self.node.css_matches(selector)
+
+    def select(self, selector):
+        return [SelectolaxElement(n) for n in self.node.css(selector)]
+
+    def select_one(self, selector):
+        node = self.node.css_first(selector)
+        return SelectolaxElement(node) if node is not None else None
+
+    def find_all(self, name=True, **attrs):
+        for node in self.node.traverse():
+            if node.tag.startswith('-') or node.mem_id == self.node.mem_id:
+                continue
+            if name is not True and node.tag != name:
+                continue
+            element = SelectolaxElement(node)
+            if all(element.attrs.get(k) == v for k, v in attrs.items()):
+                yield element
+
+
+class SelectolaxDocument(SelectolaxElement):
+    """Document root for the selectolax (lexbor) backend"""
+
+    __slots__ = ('tree',)
+
+    def __init__(self, html):
+        from selectolax.lexbor import LexborHTMLParser
+        self.tree = LexborHTMLParser(html)
+        super().__init__(self.tree.root)
+
+    def find_all(self, name=True, **attrs):
+        # The root <html> element is part of the document, unlike for an element
+        root = SelectolaxElement(self.tree.root)
+        if (name is True or root.name == name) and all(root.attrs.get(k) == v for k, v in attrs.items()):
+            yield root
+        yield from super().find_all(name, **attrs)
+
+
+# Parity checking across backends
+
+def json_ld_blocks(document):
+    """Parsed JSON-LD payloads of a document (invalid blocks skipped)"""
+    blocks = []
+    for script in document.find_all('script', type='application/ld+json'):
+        try:
+            blocks.append(json.loads(script.string))
+        except (TypeError, ValueError):
+            continue
+    return blocks
+
+
+def extraction_snapshot(html, backend):
+    """What the extractors see on one backend, for comparisons"""
+    from extraction import DEFAULT_PLAN
+    document = parse_document(html, backend=backend)
+    current_price, original_price, name = DEFAULT_PLAN.run(document)
+    return {
+        'current_price': current_price,
+        'original_price': original_price,
+        'name': name,
+        'json_ld': json_ld_blocks(document),
+    }
+
+
+def compare_backends(html, backends=None):
+    """Return {backend: snapshot} and the fields that differ from the first backend"""
+    backends = backends or available_backends()
+    snapshots = {backend: extraction_snapshot(html, backend) for backend in backends}
+    reference = snapshots[backends[0]]
+    differences = {}
+    for backend in backends[1:]:
+        fields = [k for k, v in snapshots[backend].items() if v != reference[k]]
+        if fields:
+            differences[backend] = fields
+    return snapshots, differences
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that every parser backend extracts the same data from saved pages")
+    parser.add_argument('pages', nargs='+', help="Saved HTML files")
+    parser.add_argument('-b', '--backends', nargs='+', choices=BACKENDS, help="Backends to compare (default: all installed)")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for path in args.pages:
+        with open(path, 'rb') as f:
+            html = f.read()
+        snapshots, differences = compare_backends(html, args.backends)
+        if not differences:
+            print(f"OK    {path}")
+            continue
+        failures += 1
+        print(f"DIFF  {path}")
+        for backend, fields in differences.items():
+            for field in fields:
+                print(f"      {field}: {backends_value(snapshots, backend, field)}")
+    return 1 if failures else 0
+
+
+def backends_value(snapshots, backend, field):
+    reference = next(iter(snapshots))
+    return f"{reference}={snapshots[reference][field]!r} {backend}={snapshots[backend][field]!r}"
+
+
+if __name__ == "__main__":
+    sys.exit(main())
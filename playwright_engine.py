@@ -0,0 +1,176 @@
+import asyncio
+import itertools
+import logging
+import random
+
+from playwright.async_api import async_playwright
+
+from async_engine import EventLoopThread
+from interception import PRODUCT_READY_SELECTOR
+from resilience import resilient, error_result
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPlaywrightEngine:
+    """Playwright engine on one long-lived Chromium (or a small pool of them)
+
+    Each URL gets its own lightweight browser context with the stealth
+    settings of ScraperEngine.configure_playwright_stealth, many pages render
+    concurrently, and the rendered DOM is handed to the shared extractor
+    (ScraperEngine.parse_with_bs) in one page.content() call.
+    """
+
+    def __init__(self, scraper, browsers=1, pages_per_browser=8, scroll_steps=(3, 7), timeout=30000):
+        self.scraper = scraper
+        self.browser_count = max(1, browsers)
+        self.pages_per_browser = pages_per_browser
+        self.scroll_steps = scroll_steps
+        self.timeout = timeout
+        self.playwright = None
+        self.browsers = []
+        self.next_browser = None
+        self.page_limit = None
+        self.launch_lock = None
+        # Background loop used by the synchronous submit() bridge
+        self.loop_thread = EventLoopThread()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def open(self):
+        """Start Playwright and launch the shared browser(s)"""
+        if self.playwright is not None:
+            return
+        self.playwright = await async_playwright().start()
+        self.browsers = [await self.launch() for _ in range(self.browser_count)]
+        self.next_browser = itertools.cycle(range(self.browser_count))
+        self.page_limit = asyncio.Semaphore(self.browser_count * self.pages_per_browser)
+        self.launch_lock = asyncio.Lock()
+
+    async def launch(self):
+        return await self.playwright.chromium.launch(headless=True)
+
+    async def aclose(self):
+        """Close every browser and stop Playwright"""
+        for browser in self.browsers:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        self.browsers = []
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
+
+    async def get_browser(self):
+        """Round-robin over the pool, relaunching a browser that crashed"""
+        index = next(self.next_browser)
+        async with self.launch_lock:
+            if not self.browsers[index].is_connected():
+                logger.info("Relaunching disconnected browser %d", index)
+                self.browsers[index] = await self.launch()
+        return self.browsers[index]
+
+    async def new_context(self, browser, url):
+        """Fresh isolated context with the stealth settings applied"""
+        viewport, headers, init_script = self.scraper.playwright_stealth_settings(url)
+        context = await browser.new_context(
+            viewport=viewport,
+            user_agent=headers['User-Agent'],
+            extra_http_headers=headers,
+            java_script_enabled=True,
+            ignore_https_errors=True
+        )
+        await context.add_init_script(init_script)
+        if self.scraper.resource_blocker is not None:
+            await self.scraper.resource_blocker.apply_playwright_async(context)
+        return context
+
+    async def goto(self, page, url):
+        """Navigate, then wait for price markup / JSON-LD rather than networkidle"""
+        wait_until = 'domcontentloaded' if self.scraper.wait_for_product else 'networkidle'
+        response = await page.goto(url, wait_until=wait_until, timeout=self.timeout)
+        if response is not None:
+            self.scraper.politeness.note_response(url, response.status, response.headers)
+        if not self.scraper.wait_for_product:
+            return
+        try:
+            await page.wait_for_selector(PRODUCT_READY_SELECTOR, state='attached',
+                                         timeout=self.scraper.ready_timeout * 1000)
+        except Exception:
+            logger.info("No price markup found before timeout on %s, extracting anyway", url)
+
+    async def scroll(self, page):
+        """Random scrolling to trigger lazy-loaded prices, without blocking the loop"""
+        if not self.scroll_steps:
+            return
+        for _ in range(random.randint(*self.scroll_steps)):
+            await page.evaluate(f"window.scrollTo(0, {random.randint(100, 1000)})")
+            await asyncio.sleep(random.uniform(0.5, 1.5))
+
+    @property
+    def resilience(self):
+        return self.scraper.resilience
+
+    @resilient
+    async def scrape(self, url):
+        """Async counterpart of ScraperEngine.scrape_with_playwright"""
+        if self.playwright is None:
+            await self.open()
+        context = None
+        try:
+            await self.scraper.politeness.wait_async(url)
+            async with self.page_limit:
+                browser = await self.get_browser()
+                context = await self.new_context(browser, url)
+                page = await context.new_page()
+                await self.goto(page, url)
+                await self.scroll(page)
+                html = await page.content()
+            return await asyncio.to_thread(self.scraper.parse_with_bs, html, url=url)
+        except Exception as e:
+            self.scraper.log_message(f"AsyncPlaywright Error: {str(e)}")
+            return error_result(e)
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+
+    async def scrape_many(self, urls):
+        """Render many URLs concurrently, results in input order"""
+        return await asyncio.gather(*(self.scrape(url) for url in urls))
+
+    def scrape_urls(self, urls):
+        """Blocking helper: scrape a list of URLs on a fresh event loop"""
+        async def run():
+            async with self:
+                return await self.scrape_many(urls)
+        return asyncio.run(run())
+
+    # Synchronous bridge for thread-based callers (e.g. the batch runner)
+
+    def start(self):
+        """Run the engine's event loop in a background thread"""
+        if self.loop_thread.loop is None:
+            self.loop_thread.start()
+            self.loop_thread.submit(self.open()).result()
+        return self
+
+    def submit(self, url):
+        """Schedule a scrape and return a concurrent.futures.Future"""
+        self.start()
+        return self.loop_thread.submit(self.scrape(url))
+
+    def stop(self):
+        """Close the browsers and stop the background loop"""
+        if self.loop_thread.loop is None:
+            return
+        self.loop_thread.submit(self.aclose()).result()
+        self.loop_thread.stop()
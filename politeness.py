@@ -0,0 +1,256 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Status codes whose Retry-After header pauses the whole host
+THROTTLE_STATUSES = (429, 503)
+# Never trust a Retry-After / Crawl-delay longer than this (seconds)
+MAX_HOST_DELAY = 600
+
+
+def host_of(url):
+    return (urlsplit(url).hostname or '').lower()
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(int(value), MAX_HOST_DELAY)
+    try:
+        return min(max(parsedate_to_datetime(value).timestamp() - time.time(), 0), MAX_HOST_DELAY)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class HostState:
+    """Token bucket and pause state of one host"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.robots = None
+        self.pending = deque()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_at(self, now):
+        """Monotonic time at which the next request may go out"""
+        self.refill(now)
+        ready = now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+        return max(ready, self.paused_until)
+
+
+class PolitenessScheduler:
+    """Per-host token buckets with a global concurrency budget
+
+    Each host gets `rate` requests per second (bursts of `burst`), slowed
+    further by its robots.txt Crawl-delay and paused by Retry-After on
+    429/503 responses. A random extra gap of up to `jitter` seconds keeps
+    the request pattern irregular. The first request to a host goes out
+    immediately.
+
+    wait() / wait_async() throttle a single call in place. submit() instead
+    queues the call per host and a dispatcher thread runs whichever host is
+    ready next on at most max_concurrency threads, so URLs of different
+    domains interleave and no worker sleeps on a busy host.
+    """
+
+    def __init__(self, rate=0.5, burst=1, jitter=1.0, max_concurrency=8, respect_robots=True,
+                 user_agent='*', robots_timeout=5):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.robots_timeout = robots_timeout
+        self.hosts = {}
+        self.condition = threading.Condition()
+        self.local = threading.local()
+        self.in_flight = 0
+        self.executor = None
+        self.dispatcher = None
+        self.closed = False
+
+    def host_state(self, host):
+        """State for a host, created on first use (condition lock held)"""
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(self.rate, self.burst)
+        return state
+
+    def take_token(self, state, now):
+        """Consume one token; returns seconds until it may be used (condition lock held)"""
+        delay = state.ready_at(now) - now
+        state.tokens -= 1
+        if self.jitter:
+            state.tokens -= random.uniform(0, self.jitter) * state.rate
+        return delay
+
+    # robots.txt
+
+    def load_robots(self, url):
+        """Apply the host's robots.txt Crawl-delay (fetched once per host)"""
+        if not self.respect_robots:
+            return
+        host = host_of(url)
+        with self.condition:
+            state = self.host_state(host)
+            if state.robots is not None:
+                return
+            state.robots = False
+        # Imported on first use to keep `import engine` fast
+        import requests
+        from urllib.robotparser import RobotFileParser
+        parts = urlsplit(url)
+        robots = RobotFileParser()
+        try:
+            response = requests.get(f"{parts.scheme}://{parts.netloc}/robots.txt", timeout=self.robots_timeout)
+            if response.status_code != 200:
+                return
+            robots.parse(response.text.splitlines())
+        except requests.RequestException as e:
+            logger.debug("robots.txt unavailable for %s: %s", host, e)
+            return
+        delay = robots.crawl_delay(self.user_agent)
+        with self.condition:
+            state.robots = robots
+            if delay:
+                delay = min(float(delay), MAX_HOST_DELAY)
+                state.rate = min(state.rate, 1 / delay)
+                logger.info("%s asks for a crawl delay of %ss", host, delay)
+
+    # Feedback from responses
+
+    def note_response(self, url, status, headers=None):
+        """Pause the host when a 429/503 carries Retry-After"""
+        if status not in THROTTLE_STATUSES:
+            return
+        # Playwright hands headers over as a plain dict with lowercase names
+        retry_after = next((v for k, v in (headers or {}).items() if k.lower() == 'retry-after'), None)
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            # No hint: back off for a few request intervals
+            delay = min(4 / self.rate, MAX_HOST_DELAY)
+        with self.condition:
+            state = self.host_state(host_of(url))
+            state.paused_until = max(state.paused_until, time.monotonic() + delay)
+            self.condition.notify_all()
+        logger.info("%s returned %s; pausing it for %.0fs", host_of(url), status, delay)
+
+    # In-place throttling
+
+    def wait(self, url):
+        """Block until the host's next slot
+
+        The first call inside a job dispatched by submit() returns at once:
+        the dispatcher already spent that slot.
+        """
+        host = host_of(url)
+        if getattr(self.local, 'admitted', None) == host:
+            self.local.admitted = None
+            return
+        self.load_robots(url)
+        with self.condition:
+            delay = self.take_token(self.host_state(host), time.monotonic())
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url):
+        """wait() for coroutines: sleeps on the event loop instead of a thread"""
+        import asyncio
+        host = host_of(url)
+        with self.condition:
+            known = host in self.hosts and self.hosts[host].robots is not None
+        if self.respect_robots and not known:
+            await asyncio.to_thread(self.load_robots, url)
+        with self.condition:
+            delay = self.take_token(self.host_state(host), time.monotonic())
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # Interleaved dispatch
+
+    def submit(self, url, fn, *args):
+        """Queue fn(url, *args) behind the host's budget; returns a concurrent.futures.Future"""
+        future = Future()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Scheduler is shut down")
+            self.host_state(host_of(url)).pending.append((url, fn, args, future))
+            if self.dispatcher is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+                self.dispatcher = threading.Thread(target=self.dispatch, daemon=True)
+                self.dispatcher.start()
+            self.condition.notify_all()
+        return future
+
+    def dispatch(self):
+        while True:
+            with self.condition:
+                job = None
+                while job is None:
+                    now = time.monotonic()
+                    waiting = [(state.ready_at(now), host, state) for host, state in self.hosts.items() if state.pending]
+                    if not waiting and self.closed:
+                        return
+                    if not waiting or self.in_flight >= self.max_concurrency:
+                        self.condition.wait()
+                        continue
+                    ready, host, state = min(waiting, key=lambda item: item[0])
+                    delay = ready - time.monotonic()
+                    if delay > 0:
+                        self.condition.wait(delay)
+                        continue
+                    self.take_token(state, time.monotonic())
+                    job = (host,) + state.pending.popleft()
+                    self.in_flight += 1
+            self.executor.submit(self.run_job, *job)
+
+    def run_job(self, host, url, fn, args, future):
+        if not future.set_running_or_notify_cancel():
+            self.job_done()
+            return
+        self.local.admitted = host
+        try:
+            # Later requests to this host then honour its Crawl-delay
+            self.load_robots(url)
+            future.set_result(fn(url, *args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self.local.admitted = None
+            self.job_done()
+
+    def job_done(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def shutdown(self):
+        """Finish queued jobs, then stop the dispatcher and its threads"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.dispatcher is not None:
+            self.dispatcher.join()
+            self.executor.shutdown(wait=True)
+        with self.condition:
+            self.dispatcher = None
+            self.executor = None
+            self.closed = False
@@ -0,0 +1,245 @@
+import argparse
+import csv
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import prices
+from resilience import OK
+from tiering import domain_of
+
+logger = logging.getLogger(__name__)
+
+CHANGE_COLUMNS = ['url', 'domain', 'scraped_at', 'engine', 'name', 'currency', 'previous_price', 'current_price',
+                  'previous_discount', 'discount_percent', 'original_price']
+
+
+class PriceHistory:
+    """Append-only SQLite log of scrape results with price-change detection
+
+    Every result becomes one row of `observations`. A successful row whose
+    current price or discount differs from the previous successful row of
+    the same URL and engine is flagged `changed` (with the previous values alongside),
+    so changes() is an index scan rather than a self-join over the history.
+    Rows are buffered and written batch_size at a time, or after
+    flush_interval seconds, in one transaction.
+    """
+
+    def __init__(self, path, batch_size=200, flush_interval=5.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.pending = []
+        self.last_flush = time.monotonic()
+        # (url, engine) -> (current_price, discount_percent) of its latest successful row;
+        # engines can disagree about one page, so each is compared with itself
+        self.latest = None
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS observations (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                scraped_at REAL NOT NULL,
+                engine TEXT,
+                status TEXT,
+                name TEXT,
+                current_price REAL,
+                original_price REAL,
+                discount_percent REAL,
+                currency TEXT,
+                previous_price REAL,
+                previous_discount REAL,
+                changed INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS observations_url ON observations (url, scraped_at);
+            CREATE INDEX IF NOT EXISTS observations_domain ON observations (domain, scraped_at);
+            CREATE INDEX IF NOT EXISTS observations_changed ON observations (scraped_at) WHERE changed = 1;
+        """)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # Databases from before prices carried a currency
+        if 'currency' not in {row[1] for row in self.db.execute("PRAGMA table_info(observations)")}:
+            self.db.execute("ALTER TABLE observations ADD COLUMN currency TEXT")
+
+    def load_latest(self):
+        """Latest successful price of every URL and engine (lock held)"""
+        self.latest = {}
+        rows = self.db.execute("""
+            SELECT url, engine, current_price, discount_percent FROM observations
+            WHERE id IN (SELECT MAX(id) FROM observations WHERE status = ? GROUP BY url, engine)""", (OK,))
+        for url, engine, price, discount in rows:
+            self.latest[(url, engine)] = (price, discount)
+
+    def record(self, url, result, engine=None, scraped_at=None):
+        """Queue one scrape result; returns True if its price changed since the engine's last successful scrape"""
+        # Failed scrapes carry the error text in current_price
+        failed = result.get('name') == 'Error'
+        status = result.get('status') or ('error' if failed else OK)
+        price = original_price = discount = currency = None
+        if not failed:
+            # Engines attach the float prices; older results only have the display strings
+            price = result.get('price_value') or prices.parse_price(result.get('current_price'))
+            original_price = result.get('original_price_value') or prices.parse_price(result.get('original_price'))
+            discount = result.get('discount_percent')
+            currency = result.get('currency') or prices.currency_for_domain(url)
+        if status == OK and not price:
+            status = 'incomplete'
+        engine = engine or result.get('engine')
+        key = (url, engine)
+        with self.lock:
+            if self.latest is None:
+                self.load_latest()
+            previous_price, previous_discount = self.latest.get(key, (None, None))
+            changed = False
+            if status == OK:
+                changed = key in self.latest and (price, discount) != (previous_price, previous_discount)
+                self.latest[key] = (price, discount)
+            self.pending.append((
+                url, domain_of(url), scraped_at or time.time(), engine, status,
+                result.get('name'), price, original_price, discount, currency,
+                previous_price if changed else None, previous_discount if changed else None, int(changed)
+            ))
+            if len(self.pending) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush_locked()
+        return changed
+
+    def flush(self):
+        with self.lock:
+            self.flush_locked()
+
+    def flush_locked(self):
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+        with self.db:
+            self.db.executemany("""
+                INSERT INTO observations (url, domain, scraped_at, engine, status, name, current_price,
+                                          original_price, discount_percent, currency, previous_price,
+                                          previous_discount, changed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", rows)
+
+    def changes(self, since=None, until=None, domain=None):
+        """Rows whose price or discount changed, oldest first, as dicts of CHANGE_COLUMNS"""
+        self.flush()
+        query = f"SELECT {', '.join(CHANGE_COLUMNS)} FROM observations WHERE changed = 1"
+        params = []
+        if since is not None:
+            query += " AND scraped_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND scraped_at < ?"
+            params.append(until)
+        if domain:
+            query += " AND domain = ?"
+            params.append(domain_of(f"http://{domain}"))
+        query += " ORDER BY scraped_at"
+        with self.lock:
+            return [dict(zip(CHANGE_COLUMNS, row)) for row in self.db.execute(query, params)]
+
+    def history(self, url):
+        """Every observation of a URL, oldest first"""
+        self.flush()
+        with self.lock:
+            cursor = self.db.execute("SELECT * FROM observations WHERE url = ? ORDER BY scraped_at", (url,))
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor]
+
+    def url_stats(self):
+        """Per URL: observations, successful ones, changes, first / last successful scrape and last status"""
+        self.flush()
+        with self.lock:
+            stats = {}
+            rows = self.db.execute("""
+                SELECT url, COUNT(*), SUM(status = ?), SUM(changed),
+                       MIN(CASE WHEN status = ? THEN scraped_at END), MAX(CASE WHEN status = ? THEN scraped_at END),
+                       MAX(scraped_at)
+                FROM observations GROUP BY url""", (OK, OK, OK))
+            for url, count, successes, changes, first_ok, last_ok, last_scraped in rows:
+                stats[url] = {'observations': count, 'successes': successes, 'changes': changes,
+                              'first_ok': first_ok, 'last_ok': last_ok, 'last_scraped': last_scraped}
+            rows = self.db.execute("""
+                SELECT url, status FROM observations
+                WHERE id IN (SELECT MAX(id) FROM observations GROUP BY url)""")
+            for url, status in rows:
+                stats[url]['last_status'] = status
+            return stats
+
+    def latest_results(self, urls):
+        """Last successful result of each URL, shaped like an engine result plus 'scraped_at'"""
+        self.flush()
+        results = {}
+        with self.lock:
+            for url in urls:
+                row = self.db.execute("""
+                    SELECT name, current_price, original_price, discount_percent, currency, engine, scraped_at
+                    FROM observations WHERE url = ? AND status = ? ORDER BY id DESC LIMIT 1""", (url, OK)).fetchone()
+                if row is None:
+                    continue
+                name, price, original_price, discount, currency, engine, scraped_at = row
+                results[url] = {
+                    'name': name,
+                    'current_price': prices.format_price(price, currency),
+                    'original_price': prices.format_price(original_price, currency),
+                    'discount_percent': discount,
+                    'price_value': price,
+                    'original_price_value': original_price,
+                    'currency': currency,
+                    'engine': engine,
+                    'status': OK,
+                    'scraped_at': scraped_at,
+                }
+        return results
+
+    def close(self):
+        with self.lock:
+            if self.db is None:
+                return
+            self.flush_locked()
+            self.db.close()
+            self.db = None
+
+
+def write_changes(changes, output):
+    """CSV of changes() rows, timestamps as ISO dates"""
+    writer = csv.DictWriter(output, fieldnames=CHANGE_COLUMNS)
+    writer.writeheader()
+    for change in changes:
+        scraped_at = datetime.fromtimestamp(change['scraped_at']).isoformat(timespec='seconds')
+        writer.writerow(dict(change, scraped_at=scraped_at))
+
+
+def parse_since(value):
+    """'24h', '7d', '30m' or an ISO date -> epoch seconds"""
+    units = {'m': 60, 'h': 3600, 'd': 86400}
+    if value[-1:] in units and value[:-1].isdigit():
+        return time.time() - int(value[:-1]) * units[value[-1]]
+    return datetime.fromisoformat(value).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Price changes recorded in a price history database")
+    parser.add_argument('database', help="SQLite file written by batch_runner.py --history")
+    parser.add_argument('--since', default='24h', help="Age ('24h', '7d') or ISO date (default: 24h)")
+    parser.add_argument('--domain', help="Only this competitor domain")
+    parser.add_argument('-o', '--output', help="Write the changes as CSV (default: stdout)")
+    args = parser.parse_args(argv)
+
+    history = PriceHistory(args.database)
+    try:
+        changes = history.changes(since=parse_since(args.since), domain=args.domain)
+    finally:
+        history.close()
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as f:
+            write_changes(changes, f)
+    else:
+        write_changes(changes, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+import importlib.util
+import math
+import re
+from array import array
+from functools import lru_cache
+
+from tiering import domain_of
+
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+# ISO code -> symbol used when formatting
+CURRENCY_SYMBOLS = {
+    'USD': '$',
+    'GBP': '£',
+    'EUR': '€',
+    'CAD': 'CA$',
+    'AUD': 'A$',
+}
+# Price text markers -> ISO code, longest first so 'CA$' wins over '$'
+CURRENCY_MARKERS = [
+    ('US$', 'USD'), ('CA$', 'CAD'), ('C$', 'CAD'), ('AU$', 'AUD'), ('A$', 'AUD'),
+    ('£', 'GBP'), ('€', 'EUR'), ('$', 'USD'),
+    ('USD', 'USD'), ('GBP', 'GBP'), ('EUR', 'EUR'), ('CAD', 'CAD'), ('AUD', 'AUD'),
+]
+CURRENCY_MARKER = re.compile('|'.join(re.escape(marker) for marker, _ in CURRENCY_MARKERS))
+MARKER_CURRENCIES = dict(CURRENCY_MARKERS)
+# A currency sign next to a digit in raw markup (UTF-8 or entity): '£5', '$5', '5 €'
+MARKUP_CURRENCY = re.compile(rb'(\xc2\xa3|&pound;|&#163;|\xe2\x82\xac|&euro;|&#8364;|\$)\s?\d'
+                             rb'|\d(?:\s|&nbsp;|\xc2\xa0)?(\xc2\xa3|&pound;|&#163;|\xe2\x82\xac|&euro;|&#8364;)')
+MARKUP_CURRENCIES = {
+    b'\xc2\xa3': 'GBP', b'&pound;': 'GBP', b'&#163;': 'GBP',
+    b'\xe2\x82\xac': 'EUR', b'&euro;': 'EUR', b'&#8364;': 'EUR',
+    b'$': 'USD',
+}
+# Domain suffix -> currency of a site that doesn't say
+DOMAIN_CURRENCIES = [
+    ('.co.uk', 'GBP'), ('.uk', 'GBP'), ('.com.au', 'AUD'), ('.au', 'AUD'), ('.ca', 'CAD'),
+    ('.ie', 'EUR'), ('.de', 'EUR'), ('.fr', 'EUR'), ('.es', 'EUR'), ('.it', 'EUR'), ('.nl', 'EUR'),
+    ('.be', 'EUR'), ('.at', 'EUR'), ('.pt', 'EUR'), ('.fi', 'EUR'),
+]
+# Sites whose prices are written 1.299,00
+DECIMAL_COMMA_DOMAINS = ('.de', '.fr', '.es', '.it', '.nl', '.be', '.at', '.pt', '.fi')
+DEFAULT_CURRENCY = 'USD'
+
+# One number: digit groups split by , . ' or (thin / no-break) spaces, or a plain number
+PRICE_NUMBER = re.compile(r"\d{1,3}(?:[,.'\s\u00a0\u2009\u202f]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?")
+GROUP_SPACES = str.maketrans('', '', "' \t\n\u00a0\u2009\u202f")
+MAX_PRICE = 1000000
+
+
+@lru_cache(maxsize=65536)
+def parse_price(price_text, decimal='.'):
+    """First price in a text as a float, or None
+
+    The last of ',' and '.' is the decimal separator when both appear. A
+    lone separator followed by exactly three digits is a thousands separator
+    unless it is the site's `decimal` ('1,299' is 1299.0 on a '.' site,
+    '1.299' is 1299.0 on a ',' site); any other lone separator is decimal.
+    """
+    if not price_text:
+        return None
+    match = PRICE_NUMBER.search(price_text)
+    if match is None:
+        return None
+    number = match.group().translate(GROUP_SPACES)
+    dot, comma = number.rfind('.'), number.rfind(',')
+    separator = None
+    if dot >= 0 and comma >= 0:
+        separator = '.' if dot > comma else ','
+    elif dot >= 0 or comma >= 0:
+        separator = '.' if dot >= 0 else ','
+        position = max(dot, comma)
+        if number.count(separator) > 1 or (len(number) - position == 4 and separator != decimal):
+            separator = None
+    if separator is None:
+        price = float(number.replace(',', '').replace('.', ''))
+    else:
+        whole, fraction = number.rsplit(separator, 1)
+        price = float(f"{whole.replace(',', '').replace('.', '')}.{fraction}")
+    return price if 0 < price < MAX_PRICE else None
+
+
+def currency_of(price_text):
+    """ISO code of the first currency marker in a price text, or None"""
+    match = CURRENCY_MARKER.search(price_text or '')
+    return MARKER_CURRENCIES[match.group()] if match else None
+
+
+def currency_in_markup(html):
+    """Most common currency sign written before a number in a page, or None"""
+    if isinstance(html, str):
+        html = html.encode('utf-8', 'ignore')
+    counts = {}
+    for match in MARKUP_CURRENCY.finditer(html):
+        currency = MARKUP_CURRENCIES[match.group(1) or match.group(2)]
+        counts[currency] = counts.get(currency, 0) + 1
+    if not counts:
+        return None
+    # '$' also prefixes template variables and scripts; any other sign outweighs it
+    counts['USD'] = counts.get('USD', 0) / 4
+    return max(counts, key=counts.get)
+
+
+def currency_for_domain(url):
+    """Currency a site prices in when the page doesn't say"""
+    domain = domain_of(url) if '//' in (url or '') else (url or '').lower()
+    return next((currency for suffix, currency in DOMAIN_CURRENCIES if domain.endswith(suffix)), DEFAULT_CURRENCY)
+
+
+def decimal_for_domain(url):
+    domain = domain_of(url) if '//' in (url or '') else (url or '').lower()
+    return ',' if domain.endswith(DECIMAL_COMMA_DOMAINS) else '.'
+
+
+def normalize_currency(currency):
+    """'gbp' / '£' -> 'GBP'; None when unknown"""
+    if not currency:
+        return None
+    currency = str(currency).strip()
+    return MARKER_CURRENCIES.get(currency) or MARKER_CURRENCIES.get(currency.upper()) or (
+        currency.upper() if len(currency) == 3 and currency.isalpha() else None)
+
+
+def format_price(price, currency=None):
+    """'$1299.00' / '£1299.00'; unknown currencies keep the '$' the results always had"""
+    if not price:
+        return None
+    symbol = CURRENCY_SYMBOLS.get(currency) or (f"{currency} " if currency else '$')
+    return f"{symbol}{price:.2f}"
+
+
+def discount_percent(original, current):
+    """Percent off the original price, rounded to 2 places; None unless original > current"""
+    if isinstance(original, str):
+        original = parse_price(original)
+    if isinstance(current, str):
+        current = parse_price(current)
+    if original and current and original > current:
+        return round((original - current) / original * 100, 2)
+    return None
+
+
+# Columns: whole result batches at once. Missing prices are NaN in array('d')
+# columns, which NumPy (when installed) wraps without copying.
+
+def parse_column(texts, decimals='.'):
+    """array('d') of parse_price over a column of texts, each distinct text parsed once
+
+    `decimals` is one separator for the whole column or one per row.
+    """
+    if isinstance(decimals, str):
+        decimals = [decimals] * len(texts)
+    parsed = {}
+    column = array('d')
+    for text, decimal in zip(texts, decimals):
+        if isinstance(text, (int, float)):
+            column.append(text if text else math.nan)
+            continue
+        key = (text, decimal)
+        if key not in parsed:
+            parsed[key] = parse_price(text, decimal) if isinstance(text, str) else None
+        price = parsed[key]
+        column.append(price if price is not None else math.nan)
+    return column
+
+
+def currency_column(texts, urls=None, declared=None):
+    """ISO code per row: the declared currency, else the text's marker, else the site's currency"""
+    urls = urls or [None] * len(texts)
+    declared = declared or [None] * len(texts)
+    return [normalize_currency(given) or currency_of(text if isinstance(text, str) else None) or
+            (currency_for_domain(url) if url else None)
+            for text, url, given in zip(texts, urls, declared)]
+
+
+def as_vector(column):
+    """A NumPy view of an array('d') column when NumPy is installed, else the column"""
+    if NUMPY_AVAILABLE:
+        import numpy
+        return numpy.frombuffer(column, dtype=numpy.float64)
+    return column
+
+
+def discount_column(original_prices, current_prices):
+    """Percent off per row (NaN unless original > current), rounded to 2 places"""
+    if NUMPY_AVAILABLE and len(current_prices) > 64:
+        import numpy
+        original, current = as_vector(original_prices), as_vector(current_prices)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            discounts = numpy.round((original - current) / original * 100, 2)
+            discounts[~(original > current)] = numpy.nan
+        return array('d', discounts.tobytes())
+    return array('d', (round((o - c) / o * 100, 2) if o > c else math.nan
+                       for o, c in zip(original_prices, current_prices)))
+
+
+def gap_column(prices, currencies, reference_price, reference_currency):
+    """Price minus the reference price per row; NaN where either is missing or the currencies differ"""
+    if reference_price != reference_price or not reference_price:
+        return array('d', [math.nan]) * len(prices)
+    if NUMPY_AVAILABLE and len(prices) > 64:
+        import numpy
+        gaps = as_vector(prices) - reference_price
+        gaps[numpy.array(currencies, dtype=object) != reference_currency] = numpy.nan
+        return array('d', gaps.tobytes())
+    return array('d', (price - reference_price if currency == reference_currency else math.nan
+                       for price, currency in zip(prices, currencies)))
+
+
+def normalize_results(results, urls=None):
+    """Typed columns of a batch of engine results: currency, price, original_price, discount_percent
+
+    Failed results get NaN prices. Numeric fields the engines attached are
+    used as they are; older results are parsed from their price strings
+    with each site's decimal separator.
+    """
+    urls = urls or [None] * len(results)
+    ok = [result.get('name') != 'Error' for result in results]
+    decimals = [decimal_for_domain(url) if url else '.' for url in urls]
+    current = parse_column([result.get('price_value') or result.get('current_price') if good else None
+                            for result, good in zip(results, ok)], decimals)
+    original = parse_column([result.get('original_price_value') or result.get('original_price') if good else None
+                             for result, good in zip(results, ok)], decimals)
+    # Results from before 'currency' existed only have the symbol of their price string
+    currencies = currency_column([result.get('current_price') if good and 'currency' not in result else None
+                                  for result, good in zip(results, ok)],
+                                 urls, [result.get('currency') for result in results])
+    return {
+        'currency': currencies,
+        'price': current,
+        'original_price': original,
+        'discount_percent': discount_column(original, current),
+    }
@@ -0,0 +1,98 @@
+import argparse
+import csv
+import logging
+import math
+import sys
+import time
+
+from price_history import PriceHistory
+from resilience import TRANSIENT, CIRCUIT_OPEN, INCOMPLETE
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+
+class RescrapePlanner:
+    """Chooses which URLs to re-scrape this cycle within a request budget
+
+    Each URL's prices are treated as changing at a steady rate, estimated
+    from its history with a prior of one change per prior_interval:
+    rate = (changes + 1) / (observed seconds + prior_interval). The chance
+    it changed since the last successful scrape is 1 - exp(-rate * age);
+    the budget goes to the URLs most likely to have changed. URLs never
+    scraped come first, URLs older than max_age are always due, and a URL
+    whose last attempt failed transiently or came back incomplete gets at
+    least failure_priority.
+    """
+
+    def __init__(self, history, budget, prior_interval=7 * DAY, max_age=30 * DAY, failure_priority=0.5):
+        self.history = history
+        self.budget = budget
+        self.prior_interval = prior_interval
+        self.max_age = max_age
+        self.failure_priority = failure_priority
+
+    def change_rate(self, stats):
+        """Estimated price changes per second"""
+        observed = (stats['last_ok'] - stats['first_ok']) if stats['first_ok'] is not None else 0
+        return (stats['changes'] + 1) / (observed + self.prior_interval)
+
+    def priority(self, stats, now):
+        """Probability that re-scraping the URL now finds a new price (inf: never scraped)"""
+        if stats is None:
+            return math.inf
+        age = max(0.0, now - (stats['last_ok'] or stats['last_scraped']))
+        if age >= self.max_age:
+            return 1.0
+        priority = 1 - math.exp(-self.change_rate(stats) * age)
+        if stats['last_status'] in (TRANSIENT, CIRCUIT_OPEN, INCOMPLETE):
+            priority = max(priority, self.failure_priority)
+        return priority
+
+    def rank(self, urls, now=None):
+        """(priority, url) of every distinct URL, most urgent first"""
+        now = now or time.time()
+        stats = self.history.url_stats()
+        ranked = [(self.priority(stats.get(url), now), url) for url in dict.fromkeys(urls)]
+        # Equally likely to have changed: least recently scraped first
+        ranked.sort(key=lambda item: (-item[0], (stats.get(item[1]) or {}).get('last_scraped') or 0))
+        return ranked
+
+    def plan(self, urls, now=None):
+        """The URLs to scrape this cycle, at most `budget` of them"""
+        ranked = self.rank(urls, now)
+        selected = [url for _, url in ranked[:self.budget]]
+        logger.info("Re-scraping %d of %d URLs this cycle", len(selected), len(ranked))
+        return selected
+
+
+def template_urls(path):
+    """Every URL of a product competitor template CSV, in file order"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        columns = [name for name in reader.fieldnames or [] if name.strip().endswith('URL')]
+        return [row[column].strip() for row in reader for column in columns if (row.get(column) or '').strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show which template URLs the next budgeted cycle would re-scrape")
+    parser.add_argument('database', help="SQLite price history (batch_runner.py --history)")
+    parser.add_argument('csv', help="product_competitor_template_*.csv")
+    parser.add_argument('-b', '--budget', type=int, required=True, help="URLs to scrape per cycle")
+    args = parser.parse_args(argv)
+
+    history = PriceHistory(args.database)
+    try:
+        planner = RescrapePlanner(history, args.budget)
+        ranked = planner.rank(template_urls(args.csv))
+    finally:
+        history.close()
+    for index, (priority, url) in enumerate(ranked):
+        marker = '*' if index < args.budget else ' '
+        print(f"{marker} {priority:8.3f}  {url}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import functools
+import inspect
+import logging
+import random
+import threading
+import time
+
+from tiering import domain_of, is_valid_result
+
+logger = logging.getLogger(__name__)
+
+# Result statuses
+OK = 'ok'
+INCOMPLETE = 'incomplete'        # page loaded, but no name / price found
+TRANSIENT = 'transient'          # timeouts, dropped connections, 408/429/5xx
+PERMANENT = 'permanent'          # other 4xx, extraction bugs: retrying will not help
+CIRCUIT_OPEN = 'circuit_open'    # host failing; not attempted
+
+TRANSIENT_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+# Exception class names (anywhere in the MRO) that mean "try again later";
+# matched by name so selenium / playwright / httpx need not be imported
+TRANSIENT_EXCEPTIONS = ('Timeout', 'TimeoutError', 'TimeoutException', 'ConnectionError', 'ConnectError',
+                        'ConnectTimeout', 'ReadTimeout', 'TransportError', 'RemoteProtocolError',
+                        'WebDriverException', 'TargetClosedError', 'ChunkedEncodingError')
+# Setup problems that happen to subclass a transient type (no browser / driver installed)
+PERMANENT_EXCEPTIONS = ('NoSuchDriverException', 'SessionNotCreatedException')
+
+
+def status_code_of(error):
+    """HTTP status attached to a requests / httpx error, if any"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(response, 'status', None)
+    return status if isinstance(status, int) else None
+
+
+def classify_error(error):
+    """TRANSIENT or PERMANENT for an exception raised while scraping"""
+    status = status_code_of(error)
+    if status is not None:
+        return TRANSIENT if status in TRANSIENT_STATUSES else PERMANENT
+    names = [cls.__name__ for cls in type(error).__mro__]
+    if any(name in PERMANENT_EXCEPTIONS for name in names):
+        return PERMANENT
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return TRANSIENT
+    if any(name in TRANSIENT_EXCEPTIONS for name in names):
+        return TRANSIENT
+    return PERMANENT
+
+
+def error_result(error):
+    """The engines' failure result, tagged for the retry layer"""
+    result = {'name': 'Error', 'current_price': f'Scraping failed: {str(error)}', 'status': classify_error(error)}
+    status = status_code_of(error)
+    if status is not None:
+        result['http_status'] = status
+    return result
+
+
+class CircuitBreaker:
+    """Fails fast for a host after repeated transient failures
+
+    Closed: requests flow. After `failure_threshold` transient failures in a
+    row the breaker opens and requests are refused for `reset_timeout`
+    seconds; then a single trial request is let through (half-open), which
+    closes the breaker on success or re-opens it on failure.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def allow(self, now):
+        if self.opened_at is None:
+            return True
+        if now - self.opened_at < self.reset_timeout or self.trial_running:
+            return False
+        self.trial_running = True
+        return True
+
+    def record(self, success, now):
+        self.trial_running = False
+        if success:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = now
+
+
+class RetryBudget:
+    """Caps retries at a fraction of first attempts so an outage cannot multiply load
+
+    Every first attempt deposits `ratio` of a retry; every retry withdraws
+    one. `reserve` retries are always available, and the balance never
+    exceeds `reserve + max_saved`.
+    """
+
+    def __init__(self, ratio=0.2, reserve=10, max_saved=100):
+        self.ratio = ratio
+        self.max_balance = reserve + max_saved
+        self.balance = reserve
+
+    def deposit(self):
+        self.balance = min(self.max_balance, self.balance + self.ratio)
+
+    def withdraw(self):
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+class Resilience:
+    """Retries, backoff and per-host circuit breakers around a scrape call
+
+    call() runs a scrape function that returns a result dict (engines turn
+    exceptions into error_result dicts). Transient failures are retried up
+    to max_attempts times with full-jitter exponential backoff while the
+    shared retry budget allows it. The returned dict gets 'attempts' and a
+    final 'status'.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=30.0, failure_threshold=5, reset_timeout=60,
+                 budget=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.budget = budget or RetryBudget()
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def breaker(self, url):
+        """Breaker of a URL's domain (lock held)"""
+        domain = domain_of(url)
+        if domain not in self.breakers:
+            self.breakers[domain] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self.breakers[domain]
+
+    def backoff(self, attempt):
+        """Full jitter: uniform between 0 and the capped exponential delay"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def admit(self, url, attempt):
+        """Whether an attempt may go out: host breaker closed and, for retries, budget left"""
+        with self.lock:
+            # Budget first: a half-open breaker hands out its one trial in allow()
+            if attempt > 1 and self.budget.balance < 1:
+                logger.info("Retry budget exhausted, giving up on %s", url)
+                return False
+            if not self.breaker(url).allow(time.monotonic()):
+                return False
+            if attempt == 1:
+                self.budget.deposit()
+            else:
+                self.budget.withdraw()
+            return True
+
+    def should_retry(self, url, result, attempt):
+        """Tag the result with status / attempts and feed the host breaker"""
+        if result.get('status') not in (TRANSIENT, PERMANENT):
+            result['status'] = OK if is_valid_result(result) else INCOMPLETE
+        result['attempts'] = attempt
+        transient = result['status'] == TRANSIENT
+        with self.lock:
+            # Only host trouble counts against the breaker: a 404 still means the host answered,
+            # and every finished attempt must end a half-open trial
+            self.breaker(url).record(not transient, time.monotonic())
+        if transient and attempt < self.max_attempts:
+            logger.info("Attempt %d for %s failed (%s), retrying", attempt, url, result['current_price'])
+            return True
+        return False
+
+    def circuit_open_result(self, url):
+        return {'name': 'Error', 'current_price': f'Scraping failed: {domain_of(url)} is failing, skipped',
+                'status': CIRCUIT_OPEN, 'attempts': 0}
+
+    def call(self, url, scrape):
+        result = None
+        for attempt in range(1, self.max_attempts + 1):
+            if not self.admit(url, attempt):
+                break
+            result = scrape()
+            if not self.should_retry(url, result, attempt):
+                break
+            time.sleep(self.backoff(attempt))
+        return result or self.circuit_open_result(url)
+
+    async def call_async(self, url, scrape):
+        """call() for coroutine functions: backoff sleeps on the event loop"""
+        import asyncio
+        result = None
+        for attempt in range(1, self.max_attempts + 1):
+            if not self.admit(url, attempt):
+                break
+            result = await scrape()
+            if not self.should_retry(url, result, attempt):
+                break
+            await asyncio.sleep(self.backoff(attempt))
+        return result or self.circuit_open_result(url)
+
+
+def resilient(method):
+    """Run an engine method (self, url) -> result through self.resilience"""
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, url):
+            resilience = self.resilience
+            if resilience is None:
+                return await method(self, url)
+            return await resilience.call_async(url, lambda: method(self, url))
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, url):
+        if self.resilience is None:
+            return method(self, url)
+        return self.resilience.call(url, lambda: method(self, url))
+    return wrapper
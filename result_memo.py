@@ -0,0 +1,112 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from extraction import extractor_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(html, *context):
+    """Hash of the page with whitespace runs collapsed, plus whatever else shapes the result"""
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    # bytes.split() collapses whitespace several times faster than a regex
+    digest = hashlib.blake2b(b' '.join(html.split()), digest_size=16)
+    for part in context:
+        digest.update(b'\0' + str(part).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultMemo:
+    """Content-addressed cache of extraction results
+
+    Maps a hash of the page body (plus engine, parser and the selector-set
+    fingerprint) straight to the result dict, so a byte-identical page is
+    never parsed twice. At most max_entries results are held in memory
+    (least recently used dropped first); with a path they are also kept in
+    SQLite across runs. Editing any selector list changes the fingerprint,
+    which both misses every old key and purges stale rows on open.
+    """
+
+    def __init__(self, max_entries=4096, path=None):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.fingerprint = extractor_fingerprint()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created REAL NOT NULL
+                )""")
+            purged = self.db.execute("DELETE FROM results WHERE fingerprint != ?", (self.fingerprint,)).rowcount
+            self.db.commit()
+            if purged:
+                logger.info("Dropped %d memoized results from an older selector set", purged)
+
+    def key(self, html, *context):
+        # Selector lists are plain module lists; pick up edits made at runtime too
+        fingerprint = extractor_fingerprint()
+        if fingerprint != self.fingerprint:
+            self.clear()
+            self.fingerprint = fingerprint
+        return content_key(html, fingerprint, *context)
+
+    def get(self, key):
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+                return dict(result)
+            if self.db is None:
+                return None
+            try:
+                row = self.db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Result memo read failed: %s", e)
+                return None
+            if row is None:
+                return None
+            result = json.loads(row[0])
+            self.remember(key, result)
+            return dict(result)
+
+    def put(self, key, result):
+        with self.lock:
+            self.remember(key, dict(result))
+            if self.db is None:
+                return
+            try:
+                self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                (key, self.fingerprint, json.dumps(result), time.time()))
+                self.db.commit()
+            except sqlite3.Error as e:
+                logger.warning("Result memo write failed: %s", e)
+
+    def remember(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM results")
+                self.db.commit()
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
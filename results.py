@@ -0,0 +1,251 @@
+import csv
+import enum
+import importlib.util
+import math
+import time
+from array import array
+from dataclasses import dataclass
+
+import prices
+from resilience import OK, INCOMPLETE, TRANSIENT, PERMANENT, CIRCUIT_OPEN
+from tiering import is_valid_result
+
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Status code = index in this list
+STATUSES = [OK, INCOMPLETE, TRANSIENT, PERMANENT, CIRCUIT_OPEN]
+COLUMNS = ['url', 'name', 'price', 'original_price', 'discount_percent', 'currency', 'engine', 'status',
+           'elapsed', 'scraped_at', 'attempts', 'http_status', 'error']
+
+
+class Currency(enum.IntEnum):
+    UNKNOWN = 0
+    USD = 1
+    GBP = 2
+    EUR = 3
+    CAD = 4
+    AUD = 5
+    NZD = 6
+    CHF = 7
+    JPY = 8
+    SEK = 9
+    NOK = 10
+    DKK = 11
+
+    @classmethod
+    def of(cls, code):
+        """Currency of an ISO code / symbol; UNKNOWN when missing or unlisted"""
+        return cls.__members__.get(prices.normalize_currency(code) or '', cls.UNKNOWN)
+
+    @property
+    def code(self):
+        return None if self is Currency.UNKNOWN else self.name
+
+
+def present(value):
+    """None for a missing (NaN) price"""
+    return None if value != value else value
+
+
+@dataclass(slots=True)
+class ScrapeResult:
+    """One scrape result with typed fields; missing prices are NaN, elapsed is in seconds"""
+    url: str
+    name: str = None
+    price: float = math.nan
+    original_price: float = math.nan
+    currency: Currency = Currency.UNKNOWN
+    engine: str = None
+    status: str = OK
+    elapsed: float = math.nan
+    scraped_at: float = 0.0
+    attempts: int = 1
+    http_status: int = 0
+    error: str = None
+
+    @classmethod
+    def from_dict(cls, url, result, engine=None, elapsed=None, scraped_at=None):
+        """From an engine result dict; its display strings are parsed only when the float fields are missing"""
+        failed = result.get('name') == 'Error'
+        price = original_price = math.nan
+        currency = Currency.UNKNOWN
+        if not failed:
+            price = result.get('price_value') or prices.parse_price(result.get('current_price') or '') or math.nan
+            original_price = (result.get('original_price_value') or prices.parse_price(result.get('original_price') or '')
+                              or math.nan)
+            code = result.get('currency') if 'currency' in result else prices.currency_of(result.get('current_price'))
+            currency = Currency.of(code or prices.currency_for_domain(url))
+        status = result.get('status') or (OK if is_valid_result(result) else PERMANENT if failed else INCOMPLETE)
+        return cls(
+            url=url,
+            name=None if failed else result.get('name'),
+            price=price,
+            original_price=original_price,
+            currency=currency,
+            engine=engine or result.get('engine'),
+            status=status,
+            elapsed=result.get('elapsed', math.nan) if elapsed is None else elapsed,
+            scraped_at=scraped_at or time.time(),
+            attempts=result.get('attempts', 1),
+            http_status=result.get('http_status') or 0,
+            error=result.get('current_price') if failed else None,
+        )
+
+    @property
+    def discount_percent(self):
+        return prices.discount_percent(present(self.original_price), present(self.price))
+
+    def to_dict(self):
+        """The engines' result dict, display strings included (for format_price_output / update_table)"""
+        if self.error is not None:
+            return {'name': 'Error', 'current_price': self.error, 'status': self.status, 'attempts': self.attempts}
+        code = self.currency.code
+        return {
+            'name': self.name or 'Not found',
+            'current_price': prices.format_price(present(self.price), code) or 'Not found',
+            'original_price': prices.format_price(present(self.original_price), code),
+            'discount_percent': self.discount_percent,
+            'price_value': present(self.price),
+            'original_price_value': present(self.original_price),
+            'currency': code,
+            'engine': self.engine,
+            'status': self.status,
+            'attempts': self.attempts,
+        }
+
+
+class ResultBatch:
+    """Scrape results as columns: typed arrays for the numbers, small-int codes for the enums
+
+    A row costs about 40 bytes of arrays plus its URL, name and error in
+    lists, against a dict of formatted strings per result. Engines are
+    dictionary-encoded (`engines` holds the names), currencies are
+    Currency values and statuses index STATUSES. to_arrow() wraps the
+    numeric arrays without copying them.
+    """
+
+    def __init__(self):
+        self.urls = []
+        self.names = []
+        self.errors = []
+        self.price = array('d')
+        self.original_price = array('d')
+        self.currency = array('B')
+        self.engine = array('B')
+        self.engines = []
+        self.status = array('B')
+        self.elapsed = array('d')
+        self.scraped_at = array('d')
+        self.attempts = array('B')
+        self.http_status = array('H')
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    def __getitem__(self, index):
+        return ScrapeResult(
+            url=self.urls[index],
+            name=self.names[index],
+            price=self.price[index],
+            original_price=self.original_price[index],
+            currency=Currency(self.currency[index]),
+            engine=self.engines[self.engine[index]],
+            status=STATUSES[self.status[index]],
+            elapsed=self.elapsed[index],
+            scraped_at=self.scraped_at[index],
+            attempts=self.attempts[index],
+            http_status=self.http_status[index],
+            error=self.errors[index],
+        )
+
+    def append(self, record):
+        if record.engine not in self.engines:
+            self.engines.append(record.engine)
+        self.urls.append(record.url)
+        self.names.append(record.name)
+        self.errors.append(record.error)
+        self.price.append(record.price)
+        self.original_price.append(record.original_price)
+        self.currency.append(record.currency)
+        self.engine.append(self.engines.index(record.engine))
+        self.status.append(STATUSES.index(record.status) if record.status in STATUSES else STATUSES.index(PERMANENT))
+        self.elapsed.append(record.elapsed)
+        self.scraped_at.append(record.scraped_at)
+        self.attempts.append(min(record.attempts, 255))
+        self.http_status.append(record.http_status)
+
+    def add(self, url, result, engine=None, elapsed=None, scraped_at=None):
+        """Append an engine result dict"""
+        self.append(ScrapeResult.from_dict(url, result, engine, elapsed, scraped_at))
+
+    def discount_percent(self):
+        return prices.discount_column(self.original_price, self.price)
+
+    def to_arrow(self):
+        """pyarrow Table of COLUMNS; numbers and codes share memory with the arrays"""
+        import pyarrow as pa
+
+        def wrap(column, arrow_type):
+            return pa.Array.from_buffers(arrow_type, len(column), [None, pa.py_buffer(column)])
+
+        def dictionary(codes, names):
+            return pa.DictionaryArray.from_arrays(wrap(codes, pa.uint8()), pa.array(names, pa.string()))
+
+        currencies = [currency.name for currency in Currency]
+        return pa.table({
+            'url': pa.array(self.urls, pa.string()),
+            'name': pa.array(self.names, pa.string()),
+            'price': wrap(self.price, pa.float64()),
+            'original_price': wrap(self.original_price, pa.float64()),
+            'discount_percent': wrap(self.discount_percent(), pa.float64()),
+            'currency': dictionary(self.currency, currencies),
+            'engine': dictionary(self.engine, [engine or '' for engine in self.engines]),
+            'status': dictionary(self.status, STATUSES),
+            'elapsed': wrap(self.elapsed, pa.float64()),
+            'scraped_at': wrap(self.scraped_at, pa.float64()),
+            'attempts': wrap(self.attempts, pa.uint8()),
+            'http_status': wrap(self.http_status, pa.uint16()),
+            'error': pa.array(self.errors, pa.string()),
+        })
+
+    def write_parquet(self, path):
+        import pyarrow.parquet as pq
+        pq.write_table(self.to_arrow(), path)
+
+    def write_arrow(self, path):
+        """Arrow IPC file (Feather v2)"""
+        import pyarrow as pa
+        table = self.to_arrow()
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    def write_csv(self, path):
+        """COLUMNS as CSV: raw numbers (blank when missing), currency codes, no display formatting"""
+        discounts = self.discount_percent()
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for index in range(len(self)):
+                writer.writerow([
+                    self.urls[index], self.names[index] or '',
+                    number(self.price[index]), number(self.original_price[index]), number(discounts[index]),
+                    Currency(self.currency[index]).code or '', self.engines[self.engine[index]] or '',
+                    STATUSES[self.status[index]], number(self.elapsed[index]), number(self.scraped_at[index]),
+                    self.attempts[index], self.http_status[index] or '', self.errors[index] or '',
+                ])
+
+    def write(self, path):
+        """Format by extension: .parquet, .arrow / .feather, anything else CSV"""
+        if path.endswith('.parquet'):
+            self.write_parquet(path)
+        elif path.endswith(('.arrow', '.feather')):
+            self.write_arrow(path)
+        else:
+            self.write_csv(path)
+
+
+def number(value):
+    return '' if value != value else repr(value)
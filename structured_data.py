@@ -0,0 +1,327 @@
+import html as html_lib
+import json
+import re
+
+from extraction import clean_price
+
+# Raw-markup scanners: no DOM needed
+JSON_LD_SCRIPT = re.compile(
+    rb"""<script\b[^>]*\btype\s*=\s*["']?application/ld\+json["']?[^>]*>(.*?)</script\s*>""",
+    re.I | re.S
+)
+TAG_WITH_ATTRS = re.compile(rb"""<(?:meta|span|div|link|data)\b[^>]*\b(?:itemprop|property)\s*=[^>]*>""", re.I)
+ATTRIBUTE = re.compile(rb"""([a-zA-Z][\w:.-]*)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+
+PRODUCT_TYPES = ('Product', 'ProductGroup', 'IndividualProduct', 'ProductModel')
+ORIGINAL_PRICE_TYPES = ('ListPrice', 'StrikethroughPrice', 'SRP', 'MSRP')
+
+# OpenGraph / Facebook product meta properties
+OG_PRICE = ('product:price:amount', 'og:price:amount')
+OG_SALE_PRICE = ('product:sale_price:amount',)
+OG_CURRENCY = ('product:price:currency', 'og:price:currency', 'product:sale_price:currency')
+
+# How deep to look for a Product inside wrapper nodes (WebPage.mainEntity, ...)
+MAX_DEPTH = 6
+
+
+def empty_product():
+    # source: first contributor; price_source: where the price came from (what trust is based on)
+    return {'name': None, 'price': None, 'original_price': None, 'currency': None, 'source': None,
+            'price_source': None}
+
+
+def is_complete(product):
+    """Good enough to skip the selector sweep: a real product name and a price from JSON-LD / microdata"""
+    return bool(product and product['name'] and product['price']
+                and product['price_source'] in ('json-ld', 'microdata'))
+
+
+def extract_product(html, content_type=None):
+    """Product name / price / original price / currency from raw markup
+
+    JSON-LD is tried first, block by block, and scanning stops at the first
+    product node with a price. Microdata and OpenGraph meta tags fill in
+    whatever is still missing. Works on str or bytes without building a DOM.
+    """
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+        content_type = 'text/html; charset=utf-8'
+    scanner = StreamingProductScanner(content_type)
+    scanner.feed(html)
+    return scanner.product()
+
+
+class StreamingProductScanner:
+    """Incremental tag scanner for response chunks
+
+    feed() only looks at markup that arrived since the last call (plus any
+    tag still open at the end of the buffer), so a streamed download can be
+    dropped as soon as complete is True. Whoever drops it sets truncated:
+    body is then only a prefix of the page.
+    """
+
+    def __init__(self, content_type=None):
+        self.content_type = content_type
+        self.encoding = None
+        self.buffer = bytearray()
+        self.script_position = 0
+        self.tag_position = 0
+        self.json_ld = empty_product()
+        self.json_ld_priced = False
+        self.tags = []
+        self.complete = False
+        self.truncated = False
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        if self.encoding is None:
+            from parsers import detect_encoding
+            self.encoding = detect_encoding(bytes(self.buffer[:4096]), self.content_type)
+
+        if not self.json_ld_priced:
+            for match in JSON_LD_SCRIPT.finditer(self.buffer, self.script_position):
+                self.script_position = match.end()
+                data = load_json(match.group(1).decode(self.encoding, errors='replace'))
+                if data is not None and merge(self.json_ld, product_from_json_ld(data), 'json-ld') \
+                        and self.json_ld['price']:
+                    self.json_ld_priced = True
+                    break
+            self.script_position = resume_position(self.buffer, self.script_position, b'<script', b'</script')
+
+        for match in TAG_WITH_ATTRS.finditer(self.buffer, self.tag_position):
+            self.tag_position = match.end()
+            self.tags.append(tag_attributes(match.group(0), self.encoding))
+        self.tag_position = resume_position(self.buffer, self.tag_position, b'<', b'>')
+
+        self.complete = is_complete(self.product())
+
+    def product(self):
+        # JSON-LD outranks meta tags even when the meta tags arrived first
+        product = dict(self.json_ld)
+        if not is_complete(product):
+            merge_meta(product, self.tags)
+        return finish(product)
+
+    @property
+    def body(self):
+        return bytes(self.buffer)
+
+
+def resume_position(buffer, position, opener, closer):
+    """Where the next scan starts: an unterminated tag, else near the end of the buffer"""
+    # Tag names match case-insensitively, like the scanning regexes
+    tail = bytes(buffer[position:]).lower()
+    open_at = tail.rfind(opener)
+    if open_at != -1 and tail.find(closer, open_at) == -1:
+        return position + open_at
+    # Keep a few bytes so an opener split across chunks is still seen
+    return max(position, len(buffer) - len(opener))
+
+
+def finish(product):
+    # Fields can come from different sources; an original price must be higher
+    if product['original_price'] and (not product['price'] or product['original_price'] <= product['price']):
+        product['original_price'] = None
+    return product
+
+
+def extract_product_from_document(document):
+    """Same as extract_product, reading from an already parsed document"""
+    product = empty_product()
+    for script in document.find_all('script', type='application/ld+json'):
+        data = load_json(script.string)
+        if data is not None and merge(product, product_from_json_ld(data), 'json-ld') and product['price']:
+            break
+    if not is_complete(product):
+        tags = []
+        for element in document.select("meta[property], [itemprop][content]"):
+            tags.append({k: v for k, v in element.attrs.items() if isinstance(v, str)})
+        merge_meta(product, tags)
+    return finish(product)
+
+
+def load_json(text):
+    if not text:
+        return None
+    text = text.strip()
+    # Some shops wrap the payload in HTML comments or CDATA
+    for prefix, suffix in (('<!--', '-->'), ('//<![CDATA[', '//]]>')):
+        if text.startswith(prefix) and text.endswith(suffix):
+            text = text[len(prefix):-len(suffix)]
+    try:
+        return json.loads(text, strict=False)
+    except ValueError:
+        return None
+
+
+def merge(product, found, source):
+    """Fill empty fields of product from found; True if anything was added"""
+    if not found:
+        return False
+    added = False
+    for key in ('name', 'price', 'original_price', 'currency'):
+        if not product[key] and found.get(key):
+            product[key] = found[key]
+            added = True
+            if key == 'price':
+                product['price_source'] = source
+    if added and product['source'] is None:
+        product['source'] = source
+    return added
+
+
+# JSON-LD
+
+def node_types(node):
+    types = node.get('@type', [])
+    if isinstance(types, str):
+        types = [types]
+    return [str(t).rsplit('/', 1)[-1] for t in types]
+
+
+def find_products(data, depth=0):
+    """Yield Product nodes from dicts, lists, @graph arrays and wrapper entities"""
+    if depth > MAX_DEPTH:
+        return
+    if isinstance(data, list):
+        for item in data:
+            yield from find_products(item, depth + 1)
+        return
+    if not isinstance(data, dict):
+        return
+    if any(t in PRODUCT_TYPES for t in node_types(data)):
+        yield data
+        return
+    for key, value in data.items():
+        if isinstance(value, (dict, list)) and key != '@context':
+            yield from find_products(value, depth + 1)
+
+
+def product_from_json_ld(data):
+    for node in find_products(data):
+        found = product_from_node(node)
+        if found['price']:
+            return found
+    # No priced product; still report a name if there is one
+    for node in find_products(data):
+        return product_from_node(node)
+    return None
+
+
+def product_from_node(node):
+    found = {'name': text_value(node.get('name')), 'price': None, 'original_price': None, 'currency': None}
+    offers = node.get('offers')
+    # ProductGroup: prices live on the variants
+    if not offers and node.get('hasVariant'):
+        variants = node['hasVariant'] if isinstance(node['hasVariant'], list) else [node['hasVariant']]
+        offers = [v.get('offers') for v in variants if isinstance(v, dict) and v.get('offers')]
+    for offer in flatten(offers):
+        price, original_price, currency = prices_from_offer(offer)
+        if price:
+            found['price'] = price
+            found['original_price'] = original_price if original_price and original_price > price else None
+            found['currency'] = currency
+            break
+    return found
+
+
+def flatten(value):
+    if isinstance(value, list):
+        for item in value:
+            yield from flatten(item)
+    elif isinstance(value, dict):
+        if 'offers' in value and not ('price' in value or 'lowPrice' in value):
+            # AggregateOffer wrapping individual offers
+            yield from flatten(value['offers'])
+        yield value
+
+
+def prices_from_offer(offer):
+    """(price, original_price, currency) from an Offer / AggregateOffer"""
+    currency = offer.get('priceCurrency')
+    price = to_price(offer.get('price'))
+    if not price and 'AggregateOffer' in node_types(offer):
+        price = to_price(offer.get('lowPrice'))
+    original_price = None
+    specs = offer.get('priceSpecification') or []
+    for spec in specs if isinstance(specs, list) else [specs]:
+        if not isinstance(spec, dict):
+            continue
+        spec_price = to_price(spec.get('price'))
+        if not spec_price:
+            continue
+        price_type = str(spec.get('priceType', ''))
+        if any(t in price_type for t in ORIGINAL_PRICE_TYPES):
+            original_price = original_price or spec_price
+        elif not price:
+            price = spec_price
+        currency = currency or spec.get('priceCurrency')
+    return price, original_price, currency
+
+
+def to_price(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if 0 < value < 1000000 else None
+    return clean_price(str(value))
+
+
+def text_value(value):
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get('@value')
+    if not isinstance(value, str):
+        return None
+    return html_lib.unescape(value).strip() or None
+
+
+# Microdata / OpenGraph
+
+def tag_attributes(tag, encoding):
+    """Attribute dict of one raw tag"""
+    attrs = {}
+    for attr in ATTRIBUTE.finditer(tag):
+        value = attr.group(2) if attr.group(2) is not None else attr.group(3) if attr.group(3) is not None else attr.group(4)
+        attrs[attr.group(1).decode('ascii', 'ignore').lower()] = html_lib.unescape(value.decode(encoding, errors='replace'))
+    return attrs
+
+
+def merge_meta(product, tags):
+    microdata = {}
+    og = {}
+    for attrs in tags:
+        content = attrs.get('content')
+        if content is None:
+            continue
+        if attrs.get('itemprop'):
+            microdata.setdefault(attrs['itemprop'], content)
+        if attrs.get('property'):
+            og.setdefault(attrs['property'].lower(), content)
+
+    merge(product, {
+        'name': text_value(microdata.get('name')),
+        'price': to_price(microdata.get('price') or microdata.get('lowPrice')),
+        'currency': microdata.get('priceCurrency'),
+    }, 'microdata')
+
+    price = first_price(og, OG_PRICE)
+    sale_price = first_price(og, OG_SALE_PRICE)
+    original_price = None
+    if sale_price and price and sale_price < price:
+        price, original_price = sale_price, price
+    merge(product, {
+        'name': text_value(og.get('og:title')),
+        'price': price,
+        'original_price': original_price,
+        'currency': next((og[k] for k in OG_CURRENCY if og.get(k)), None),
+    }, 'opengraph')
+
+
+def first_price(og, keys):
+    for key in keys:
+        price = to_price(og.get(key))
+        if price:
+            return price
+    return None
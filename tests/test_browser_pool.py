@@ -0,0 +1,126 @@
+import contextvars
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from browser_pool import PlaywrightBrowserPool
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.closed_on = None
+
+    def is_connected(self):
+        return self.closed_on is None
+
+    def close(self):
+        # The sync API refuses calls from any other thread
+        assert threading.get_ident() == self.thread
+        self.closed_on = threading.get_ident()
+
+
+@pytest.fixture
+def launched(monkeypatch):
+    """Browsers launched by pools, with a stand-in playwright.sync_api"""
+    class Playwright:
+        def stop(self):
+            pass
+
+    class Manager:
+        def start(self):
+            return Playwright()
+
+    module = types.ModuleType('playwright.sync_api')
+    module.sync_playwright = Manager
+    monkeypatch.setitem(sys.modules, 'playwright.sync_api', module)
+    browsers = []
+
+    def launch(playwright):
+        browsers.append(FakeBrowser())
+        return browsers[-1]
+    return browsers, launch
+
+
+def test_browser_is_reused_across_calling_threads(launched):
+    browsers, launch = launched
+    pool = PlaywrightBrowserPool(launch, size=1)
+    with ThreadPoolExecutor(4) as executor:
+        used = list(executor.map(lambda n: pool.run(lambda browser, n: (browser, n), n), range(20)))
+    assert len(browsers) == 1
+    assert [n for _, n in used] == list(range(20))
+    assert all(browser is browsers[0] for browser, _ in used)
+    pool.close()
+    assert browsers[0].closed_on == browsers[0].thread
+
+
+def test_browser_is_recycled_after_max_pages(launched):
+    browsers, launch = launched
+    pool = PlaywrightBrowserPool(launch, size=1, max_pages=3)
+    for _ in range(7):
+        pool.run(lambda browser: None)
+    pool.close()
+    assert len(browsers) == 3
+    assert all(browser.closed_on for browser in browsers)
+
+
+def test_errors_reach_the_caller_and_the_worker_survives(launched):
+    browsers, launch = launched
+    pool = PlaywrightBrowserPool(launch, size=1)
+
+    def fail(browser):
+        raise ValueError('navigation failed')
+    with pytest.raises(ValueError):
+        pool.run(fail)
+    assert pool.run(lambda browser: browser) is browsers[0]
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.run(lambda browser: None)
+
+
+def test_runs_in_the_callers_context(launched):
+    _, launch = launched
+    current = contextvars.ContextVar('current', default=None)
+    current.set('scrape span')
+    pool = PlaywrightBrowserPool(launch, size=2)
+    assert pool.run(lambda browser: current.get()) == 'scrape span'
+    pool.close()
+
+
+class FakePage:
+    url = 'about:blank'
+
+    def __getattr__(self, name):
+        # set_viewport_size, add_init_script, ...: accepted and ignored
+        return lambda *args, **kwargs: None
+
+    def goto(self, url, **kwargs):
+        raise ConnectionError('offline')
+
+
+class FakeContext(FakePage):
+    def new_page(self):
+        return FakePage()
+
+
+def test_submitted_scrape_takes_one_politeness_token(launched, monkeypatch):
+    from engine import ScraperEngine
+    from politeness import PolitenessScheduler
+    _, launch = launched
+    monkeypatch.setattr(FakeBrowser, 'new_context', lambda browser, **options: FakeContext(), raising=False)
+    scraper = ScraperEngine()
+    scraper.resilience = None
+    scraper.politeness = PolitenessScheduler(rate=0.5, jitter=0, respect_robots=False)
+    scraper.playwright_pool = PlaywrightBrowserPool(launch, size=1)
+    try:
+        started = time.monotonic()
+        result = scraper.politeness.submit('https://shop.example.com/p/1', scraper.scrape_with_playwright).result()
+        assert result['name'] == 'Error'
+        # The dispatcher spent the slot; a wait() on the pool's thread would sleep 2s for a second one
+        assert time.monotonic() - started < 1
+    finally:
+        scraper.close()
@@ -0,0 +1,46 @@
+import gzip
+
+from discovery import BloomFilter, Discovery
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=10000, error_rate=0.001)
+    urls = [f"https://shop.example.com/products/{i}" for i in range(10000)]
+    added = sum(bloom.add(url) for url in urls)
+    # An add that collides with earlier items reports a (false) duplicate
+    assert added > 10000 * 0.99
+    assert bloom.count == added
+    assert all(url in bloom for url in urls)
+    assert not any(bloom.add(url) for url in urls)
+    assert bloom.count == added
+
+
+def test_bloom_filter_false_positive_rate_is_near_target():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    for i in range(10000):
+        bloom.add(f"https://shop.example.com/products/{i}")
+    false_positives = sum(f"https://other.example.com/p/{i}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+
+
+def sitemap(entries, tag='url'):
+    items = ''.join(f"<{tag}><loc>{loc}</loc><lastmod>{lastmod}</lastmod></{tag}>" for loc, lastmod in entries)
+    root = 'sitemapindex' if tag == 'sitemap' else 'urlset'
+    return f'<?xml version="1.0"?><{root} xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{items}</{root}>'
+
+
+def test_sitemap_index_and_gzip_children(site):
+    directory, base = site
+    (directory / 'products.xml.gz').write_bytes(gzip.compress(sitemap([
+        (f"{base}/products/chair", '2025-05-01'),
+        (f"{base}/products/old-table", '2024-01-01'),
+        (f"{base}/about", '2025-05-01'),
+    ]).encode('utf-8')))
+    (directory / 'sitemap.xml').write_text(sitemap([(f"{base}/products.xml.gz", '2025-05-01')], 'sitemap'))
+    discovery = Discovery(modified_since='2025-01-01')
+    discovery.politeness.rate = 1000
+    try:
+        urls = list(discovery.discover(sitemaps=[f"{base}/sitemap.xml", f"{base}/sitemap.xml"]))
+    finally:
+        discovery.close()
+    assert urls == [f"{base}/products/chair"]
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+import extraction
+import parsers
+from extraction import DEFAULT_PLAN, WAS_KEYWORDS, clean_price
+
+CLASSES = ['price', 'Price', 'was-price', 'old-price', 'regular-price', 'price--sale', 'current-price',
+           'sale-price', 'product-title', 'product-name', 'title', 'name', 'compare-price', 'price__regular',
+           'list-price', 'special-price', 'offer-price', 'card', 'item', 'wrapper']
+ATTRIBUTES = ['data-price="1"', 'data-product-price="1"', "itemprop='price'", "itemprop='name'",
+              'data-regular-price="1"', 'data-compare-price="1"']
+TEXTS = ['$450.00', '$1,299.00', 'Was $500', 'Regular price $89.99', 'Sale $12', 'Calpi Chair', 'MSRP 99',
+         'Now only 19.99', 'List: 1.299,00', 'Free shipping', '']
+TAGS = ['div', 'span', 'p', 'h1', 'h2', 'del', 'ins', 's', 'strong']
+
+
+def random_element(rng, depth):
+    tag = rng.choice(TAGS)
+    attrs = []
+    if rng.random() < 0.7:
+        attrs.append('class="{}"'.format(' '.join(rng.sample(CLASSES, rng.randint(1, 2)))))
+    if rng.random() < 0.2:
+        attrs.append(rng.choice(ATTRIBUTES))
+    children = ''
+    if depth < 3:
+        children = ''.join(random_element(rng, depth + 1) for _ in range(rng.randint(0, 3)))
+    return f"<{tag} {' '.join(attrs)}>{rng.choice(TEXTS)}{children}</{tag}>"
+
+
+def random_document(seed):
+    rng = random.Random(seed)
+    body = ''.join(random_element(rng, 0) for _ in range(rng.randint(1, 6)))
+    return f"<html><body>{body}</body></html>"
+
+
+def select_loops(soup):
+    """The soup.select loops ExtractionPlan replaced, kept as the reference"""
+    current_price = original_price = name = None
+    for selector in extraction.PRICE_SELECTORS:
+        for element in soup.select(selector):
+            text = element.get_text().lower()
+            if not any(word in text for word in WAS_KEYWORDS):
+                current_price = clean_price(text)
+                if current_price:
+                    break
+        if current_price:
+            break
+    for selector in extraction.WAS_PRICE_SELECTORS:
+        for element in soup.select(selector):
+            text = element.get_text().lower()
+            if any(word in text for word in WAS_KEYWORDS):
+                price = clean_price(text)
+                if price and (not current_price or price > current_price):
+                    original_price = price
+                    break
+        if original_price:
+            break
+    for selector in extraction.NAME_SELECTORS:
+        element = soup.select_one(selector)
+        if element:
+            name = element.get_text().strip()
+            break
+    return current_price, original_price, name
+
+
+@pytest.mark.parametrize('batch', range(10))
+def test_plan_matches_select_loops(batch):
+    for seed in range(batch * 100, batch * 100 + 100):
+        soup = parsers.parse_document(random_document(seed))
+        assert DEFAULT_PLAN.run(soup) == select_loops(soup), random_document(seed)
+
+
+def test_known_price_skips_price_selectors():
+    soup = parsers.parse_document('<div class="price">$450.00</div><del class="was-price">Was $500.00</del>')
+    assert DEFAULT_PLAN.run(soup, known_price=400.0)[:2] == (400.0, 500.0)
+    assert DEFAULT_PLAN.run(soup)[:2] == (450.0, 500.0)
+
+
+def test_was_price_markup_prefilter():
+    assert extraction.has_was_price_markup(b'<span class="compare-price">$5</span>')
+    assert not extraction.has_was_price_markup(b'<span class="price">$5</span>')
@@ -0,0 +1,55 @@
+import json
+
+from engine import ScraperEngine
+from http_cache import HttpCache
+
+PRODUCT = {'@context': 'https://schema.org', '@type': 'Product', 'name': 'Calpi Chair',
+           'offers': {'@type': 'Offer', 'price': '1299.00', 'priceCurrency': 'GBP'}}
+
+
+def write_page(directory, padding):
+    html = (f'<html><head><script type="application/ld+json">{json.dumps(PRODUCT)}</script></head>'
+            f'<body>{"<p>filler</p>" * padding}</body></html>')
+    (directory / 'p.html').write_text(html, encoding='utf-8')
+    return html
+
+
+def engine_with_cache(tmp_path):
+    engine = ScraperEngine()
+    engine.resilience = None
+    engine.politeness.rate = 1000
+    engine.http_cache = HttpCache(str(tmp_path / 'cache'))
+    return engine
+
+
+def test_result_only_entries(tmp_path):
+    cache = HttpCache(str(tmp_path / 'cache'))
+    cache.store('https://a.com/p', {'ETag': '"1"'}, None, {'name': 'A', 'current_price': '$1.00'})
+    entry = cache.get('https://a.com/p')
+    assert cache.body(entry) is None
+    assert entry['result']['name'] == 'A'
+    # Nothing to answer a 304 with: not stored at all
+    cache.store('https://b.com/p', {'ETag': '"1"'}, None, None)
+    assert cache.get('https://b.com/p') is None
+
+
+def test_truncated_stream_caches_the_result_not_the_body(site):
+    directory, base = site
+    write_page(directory, 20000)
+    engine = engine_with_cache(directory)
+    engine.streaming_fetch = True
+    first = engine.scrape_with_bs(f"{base}/p.html")
+    assert first['name'] == 'Calpi Chair'
+    entry = engine.http_cache.get(f"{base}/p.html")
+    assert engine.http_cache.body(entry) is None
+    # 304: answered from the stored result
+    assert engine.scrape_with_bs(f"{base}/p.html")['current_price'] == first['current_price']
+
+
+def test_full_download_caches_the_body(site):
+    directory, base = site
+    html = write_page(directory, 10)
+    engine = engine_with_cache(directory)
+    engine.scrape_with_bs(f"{base}/p.html")
+    entry = engine.http_cache.get(f"{base}/p.html")
+    assert engine.http_cache.body(entry).decode('utf-8') == html
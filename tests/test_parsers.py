@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+import parsers
+from parse_workers import extract_record
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+PAGES = sorted(name for name in os.listdir(FIXTURES) if name.endswith('.html'))
+# name, current price, original price, currency of every fixture page
+EXPECTED = {
+    'listing_without_structured_data.html': ('Kos Outdoor Sofa', 2450.0, 2900.0, 'USD'),
+    'shopify_product.html': ('Calpi Dining Chair', 1299.0, 1599.0, 'GBP'),
+    'windows1252_product.html': ('Garden Bench – Oak', 349.0, 399.0, 'GBP'),
+    'woocommerce_product.html': ('Lisboa Lounge Chair', 450.0, 500.0, 'USD'),
+}
+
+
+def read(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def backend_param(backend):
+    installed = backend in parsers.available_backends()
+    return pytest.param(backend, marks=pytest.mark.skipif(not installed, reason=f"{backend} not installed"))
+
+
+BACKENDS = [backend_param(backend) for backend in parsers.BACKENDS]
+
+
+def test_every_fixture_has_expectations():
+    assert set(PAGES) == set(EXPECTED)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('page', PAGES)
+def test_backend_extracts_the_same_as_html_parser(page, backend):
+    html = read(page)
+    reference = parsers.extraction_snapshot(html, 'html.parser')
+    assert parsers.extraction_snapshot(html, backend) == reference
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('page', PAGES)
+def test_extract_record(page, backend):
+    assert extract_record(read(page), parser_backend=backend) == EXPECTED[page]
+
+
+@pytest.mark.parametrize('page', PAGES)
+def test_compare_backends_reports_no_differences(page):
+    _, differences = parsers.compare_backends(read(page))
+    assert differences == {}
+
+
+def test_detect_encoding():
+    assert parsers.detect_encoding(b'\xef\xbb\xbf<html>') == 'utf-8'
+    assert parsers.detect_encoding(b'<html>', 'text/html; charset=ISO-8859-1') == 'windows-1252'
+    assert parsers.detect_encoding(read('windows1252_product.html')) == 'cp1252'
+    assert parsers.detect_encoding('<p>café</p>'.encode('utf-8')) == 'utf-8'
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from price_history import PriceHistory
+
+
+def result(price, original=None, discount=None):
+    return {'name': 'Chair', 'current_price': f"${price:.2f}", 'price_value': price,
+            'original_price': f"${original:.2f}" if original else None, 'original_price_value': original,
+            'discount_percent': discount, 'currency': 'USD'}
+
+
+URL = 'https://shop.example.com/p/1'
+
+
+def open_history(tmp_path):
+    return PriceHistory(str(tmp_path / 'history.sqlite3'), batch_size=1)
+
+
+def test_first_scrape_is_not_a_change(tmp_path):
+    history = open_history(tmp_path)
+    assert not history.record(URL, result(10.0), engine='BeautifulSoup')
+    assert not history.record(URL, result(10.0), engine='BeautifulSoup')
+    assert history.record(URL, result(9.0), engine='BeautifulSoup')
+    changes = history.changes()
+    assert [(c['previous_price'], c['current_price']) for c in changes] == [(10.0, 9.0)]
+    history.close()
+
+
+def test_engines_are_compared_with_themselves(tmp_path):
+    history = open_history(tmp_path)
+    for _ in range(2):
+        assert not history.record(URL, result(10.0), engine='BeautifulSoup')
+        assert not history.record(URL, result(12.0), engine='Selenium')
+    assert history.changes() == []
+    history.close()
+
+
+def test_failures_do_not_reset_the_last_price(tmp_path):
+    history = open_history(tmp_path)
+    history.record(URL, result(10.0), engine='BeautifulSoup')
+    error = {'name': 'Error', 'current_price': 'Scraping failed: 503 for shop.example.com', 'status': 'transient'}
+    assert not history.record(URL, error, engine='BeautifulSoup')
+    assert not history.record(URL, result(10.0), engine='BeautifulSoup')
+    statuses = [row['status'] for row in history.history(URL)]
+    assert statuses == ['ok', 'transient', 'ok']
+    history.close()
+
+
+def test_discount_change_is_a_change(tmp_path):
+    history = open_history(tmp_path)
+    history.record(URL, result(10.0), engine='BeautifulSoup')
+    assert history.record(URL, result(10.0, 12.0, 16.67), engine='BeautifulSoup')
+    history.close()
+
+
+def test_latest_is_reloaded_from_disk(tmp_path):
+    history = open_history(tmp_path)
+    history.record(URL, result(10.0), engine='BeautifulSoup')
+    history.close()
+    history = open_history(tmp_path)
+    assert history.record(URL, result(11.0), engine='BeautifulSoup')
+    assert history.latest_results([URL])[URL]['current_price'] == '$11.00'
+    history.close()
+
+
+def test_budget_skipped_rows_keep_stored_engine_and_time(tmp_path):
+    from batch_runner import BatchRunner
+    runner = BatchRunner(engine='BeautifulSoup', history_path=str(tmp_path / 'history.sqlite3'), selected_urls=[])
+    runner.scraper.price_history.record(URL, result(80.0), engine='Selenium', scraped_at=1700000000.0)
+    row = runner.build_output_row({'Product Name': 'Chair', 'My Product URL': URL}, ['My Product URL'], {})
+    assert row['My Product Current Price'] == '$80.00'
+    assert row['Engine'] == 'Selenium'
+    assert row['Scraped At'] == datetime.fromtimestamp(1700000000.0).isoformat(timespec='seconds')
@@ -0,0 +1,78 @@
+import math
+
+import pytest
+
+import prices
+from engine import ScraperEngine
+
+
+@pytest.mark.parametrize('text, decimal, expected', [
+    ('$1,299.00', '.', 1299.0),
+    ('£1,299', '.', 1299.0),
+    ('1.299,00 €', '.', 1299.0),
+    ('1.299,00 €', ',', 1299.0),
+    ('1.299 €', ',', 1299.0),
+    ('1.299', '.', 1.299),
+    ('1,299', ',', 1.299),
+    ('12,99 €', '.', 12.99),
+    ('1 299,00 €', ',', 1299.0),
+    ('1 299,00 €', ',', 1299.0),
+    ("CHF 1'299.50", '.', 1299.5),
+    ('Was $500 Now $450', '.', 500.0),
+    ('$0.00', '.', None),
+    ('2.450.000', '.', None),
+    ('Sold out', '.', None),
+    ('', '.', None),
+])
+def test_parse_price(text, decimal, expected):
+    assert prices.parse_price(text, decimal) == expected
+
+
+def test_currency_detection():
+    assert prices.currency_of('CA$ 45') == 'CAD'
+    assert prices.currency_of('£1,299.00') == 'GBP'
+    assert prices.currency_in_markup('<p>£1,299</p><script>x = "$1"</script>') == 'GBP'
+    assert prices.currency_in_markup(b'<p>no prices</p>') is None
+    assert prices.currency_for_domain('https://www.pavilionbroadway.co.uk/p/1') == 'GBP'
+    assert prices.currency_for_domain('https://shop.example.com/p/1') == 'USD'
+    assert prices.decimal_for_domain('https://moebel.example.de/p/1') == ','
+
+
+def test_format_and_discount():
+    assert prices.format_price(1299, 'GBP') == '£1299.00'
+    assert prices.format_price(5, None) == '$5.00'
+    assert prices.format_price(None, 'GBP') is None
+    assert prices.discount_percent('$500.00', '$450.00') == 10.0
+    assert prices.discount_percent(450.0, 500.0) is None
+
+
+def test_columns():
+    results = [
+        {'name': 'A', 'current_price': '$450.00', 'original_price': '$500.00'},
+        {'name': 'B', 'current_price': '£1299.00', 'price_value': 1299.0, 'currency': 'GBP'},
+        {'name': 'Error', 'current_price': 'Scraping failed: 404'},
+    ]
+    columns = prices.normalize_results(results, ['https://a.com/p', 'https://b.co.uk/p', 'https://c.com/p'])
+    assert columns['currency'][:2] == ['USD', 'GBP']
+    assert list(columns['price'][:2]) == [450.0, 1299.0]
+    assert math.isnan(columns['price'][2])
+    assert columns['discount_percent'][0] == 10.0
+    gaps = prices.gap_column(columns['price'], columns['currency'], 400.0, 'USD')
+    assert gaps[0] == 50.0 and math.isnan(gaps[1]) and math.isnan(gaps[2])
+
+
+def test_engine_reads_prices_with_the_sites_decimal_separator():
+    html = b'<html><body><h1 class="product-title">Tisch</h1><span class="price">1.299 \xe2\x82\xac</span></body></html>'
+    engine = ScraperEngine()
+    german = engine.parse_with_bs(html, 'text/html; charset=utf-8', url='https://moebel.example.de/p/1')
+    assert german['price_value'] == 1299.0
+    assert german['current_price'] == '€1299.00'
+    assert engine.parse_with_bs(html, 'text/html; charset=utf-8', url='https://shop.example.com/p/1')[
+        'price_value'] == 1.299
+    # No sign on the page: a GBP site's price is in pounds, not the '$' default (same page, same memo)
+    unsigned = b'<html><body><h1 class="product-title">Sofa</h1><span class="price">1,299.00</span></body></html>'
+    british = engine.parse_with_bs(unsigned, 'text/html; charset=utf-8', url='https://www.pavilionbroadway.co.uk/p/1')
+    assert british['current_price'] == '£1299.00'
+    assert british['currency'] == 'GBP'
+    american = engine.parse_with_bs(unsigned, 'text/html; charset=utf-8', url='https://shop.example.com/p/1')
+    assert american['current_price'] == '$1299.00'
@@ -0,0 +1,94 @@
+from resilience import (Resilience, CircuitBreaker, RetryBudget, error_result, OK, TRANSIENT, PERMANENT,
+                        CIRCUIT_OPEN)
+
+URL = 'https://shop.example.com/p/1'
+GOOD = {'name': 'Chair', 'current_price': '$10.00'}
+
+
+class HttpError(Exception):
+    def __init__(self, status):
+        super().__init__(f"{status} error")
+        self.response = type('Response', (), {'status_code': status})()
+
+
+def failing(status):
+    return lambda: error_result(HttpError(status))
+
+
+def open_breaker(resilience):
+    for _ in range(resilience.failure_threshold):
+        resilience.call(URL, failing(503))
+    assert resilience.call(URL, lambda: GOOD)['status'] == CIRCUIT_OPEN
+
+
+def expire(resilience):
+    resilience.breakers['shop.example.com'].opened_at -= resilience.reset_timeout + 1
+
+
+def test_breaker_opens_after_threshold_and_half_opens_once():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record(False, 0)
+    assert breaker.allow(1)
+    breaker.record(False, 1)
+    assert not breaker.allow(5)
+    assert breaker.allow(12)
+    # Only one trial while half-open
+    assert not breaker.allow(12)
+    breaker.record(True, 13)
+    assert breaker.allow(13)
+
+
+def test_failed_trial_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record(False, 0)
+    assert breaker.allow(11)
+    breaker.record(False, 11)
+    assert not breaker.allow(12)
+    assert breaker.allow(22)
+
+
+def test_permanent_trial_result_closes_breaker():
+    resilience = Resilience(max_attempts=1, failure_threshold=2, reset_timeout=60)
+    open_breaker(resilience)
+    expire(resilience)
+    assert resilience.call(URL, failing(404))['status'] == PERMANENT
+    # Regression: a 404 trial used to leave the breaker half-open for good
+    assert resilience.call(URL, lambda: dict(GOOD))['status'] == OK
+
+
+def test_transient_failures_are_retried_and_tagged(monkeypatch):
+    monkeypatch.setattr('time.sleep', lambda seconds: None)
+    resilience = Resilience(max_attempts=3)
+    results = iter([error_result(HttpError(503)), dict(GOOD)])
+    result = resilience.call(URL, lambda: next(results))
+    assert result['status'] == OK
+    assert result['attempts'] == 2
+
+
+def test_permanent_failures_are_not_retried():
+    calls = []
+    resilience = Resilience(max_attempts=3)
+    result = resilience.call(URL, lambda: calls.append(1) or error_result(HttpError(404)))
+    assert result['status'] == PERMANENT
+    assert len(calls) == 1
+
+
+def test_retry_budget_caps_retries():
+    budget = RetryBudget(ratio=0.5, reserve=1, max_saved=1)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    for _ in range(10):
+        budget.deposit()
+    assert budget.balance == 2
+
+
+def test_exhausted_budget_does_not_take_the_half_open_trial(monkeypatch):
+    monkeypatch.setattr('time.sleep', lambda seconds: None)
+    resilience = Resilience(max_attempts=2, failure_threshold=1, reset_timeout=60,
+                            budget=RetryBudget(ratio=0, reserve=0))
+    assert resilience.call(URL, failing(503))['status'] == TRANSIENT
+    expire(resilience)
+    assert resilience.call(URL, lambda: dict(GOOD))['status'] == OK
@@ -0,0 +1,63 @@
+import json
+
+import structured_data
+from structured_data import StreamingProductScanner, empty_product, extract_product, is_complete, merge
+
+
+def json_ld(node):
+    return f'<script type="application/ld+json">{json.dumps(node)}</script>'
+
+
+PRODUCT = {'@type': 'Product', 'name': 'Calpi Chair',
+           'offers': {'@type': 'Offer', 'price': '1299.00', 'priceCurrency': 'GBP'}}
+
+
+def test_merge_fills_only_empty_fields():
+    product = empty_product()
+    assert merge(product, {'name': 'A', 'price': 10.0}, 'json-ld')
+    assert not merge(product, {'name': 'B', 'price': 12.0}, 'opengraph')
+    assert merge(product, {'name': 'B', 'original_price': 15.0}, 'opengraph')
+    assert (product['name'], product['price'], product['original_price']) == ('A', 10.0, 15.0)
+    assert product['source'] == 'json-ld'
+    assert product['price_source'] == 'json-ld'
+    assert not merge(product, None, 'microdata')
+
+
+def test_price_source_is_tracked_separately():
+    product = empty_product()
+    merge(product, {'name': 'A'}, 'json-ld')
+    merge(product, {'price': 10.0}, 'opengraph')
+    assert product['source'] == 'json-ld'
+    assert product['price_source'] == 'opengraph'
+    # An OpenGraph price is not trusted enough to skip the DOM
+    assert not is_complete(product)
+
+
+def test_json_ld_name_with_opengraph_price_is_not_complete():
+    html = (f'<html><head>{json_ld({"@type": "Product", "name": "Calpi Chair"})}'
+            '<meta property="og:price:amount" content="1299.00"></head><body></body></html>')
+    product = extract_product(html)
+    assert product['name'] == 'Calpi Chair' and product['price'] == 1299.0
+    assert not is_complete(product)
+
+
+def test_json_ld_product_is_complete():
+    product = extract_product(f'<html><head>{json_ld(PRODUCT)}</head></html>')
+    assert is_complete(product)
+    assert (product['price'], product['currency']) == (1299.0, 'GBP')
+
+
+def test_scanner_resumes_uppercase_tags_split_across_chunks():
+    html = f'<HTML><HEAD>{json_ld(PRODUCT).replace("script", "SCRIPT")}</HEAD></HTML>'.encode('utf-8')
+    split = html.index(b'Calpi')
+    scanner = StreamingProductScanner('text/html; charset=utf-8')
+    scanner.feed(html[:split])
+    assert not scanner.complete
+    scanner.feed(html[split:])
+    assert scanner.complete
+    assert scanner.product()['name'] == 'Calpi Chair'
+
+
+def test_resume_position_is_case_insensitive():
+    buffer = bytearray(b'<p>x</p><SCRIPT type="application/ld+json">{"a":')
+    assert structured_data.resume_position(buffer, 0, b'<script', b'</script') == buffer.index(b'<SCRIPT')
@@ -0,0 +1,33 @@
+from batch_runner import BatchRunner, main
+from tiering import TierPolicy
+
+URL = 'https://shop.example.com/p/1'
+
+
+def test_escalates_after_repeated_failures():
+    policy = TierPolicy(escalate_after=2, reprobe_every=0)
+    for _ in range(2):
+        policy.record(URL, 'BeautifulSoup', False)
+    assert policy.plan(URL) == ['Playwright', 'Selenium']
+    policy.record(URL, 'BeautifulSoup', True)
+    assert policy.plan(URL) == ['BeautifulSoup', 'Playwright', 'Selenium']
+
+
+def test_tier_state_survives_between_runs(tmp_path):
+    path = str(tmp_path / 'tiers.json')
+    runner = BatchRunner(engine='Production', tier_state=path)
+    for _ in range(2):
+        runner.scraper.tier_policy.record(URL, 'BeautifulSoup', False)
+    runner.scraper.close()
+
+    later = BatchRunner(engine='Production', tier_state=path)
+    assert later.scraper.tier_policy.start_tier('shop.example.com') == 'Playwright'
+    later.scraper.close()
+
+
+def test_tier_state_option(tmp_path):
+    template = tmp_path / 'template.csv'
+    template.write_text('Product Name,My Product URL\n', encoding='utf-8')
+    path = tmp_path / 'tiers.json'
+    assert main([str(template), '-o', str(tmp_path / 'out.csv'), '-e', 'Production', '--tier-state', str(path)]) == 0
+    assert path.exists()
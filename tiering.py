@@ -0,0 +1,98 @@
+import json
+import logging
+import threading
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Cheapest first
+TIERS = ['BeautifulSoup', 'Playwright', 'Selenium']
+
+
+def is_valid_result(result):
+    """A result is good enough when it has both a product name and a current price"""
+    if not result:
+        return False
+    name = result.get('name')
+    price = result.get('current_price')
+    if not name or name in ('Error', 'Not found'):
+        return False
+    if not price or price == 'Not found' or str(price).startswith('Scraping failed'):
+        return False
+    return True
+
+
+def domain_of(url):
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class TierPolicy:
+    """Learns per domain which engine tier is needed
+
+    A tier that fails `escalate_after` times in a row on a domain is skipped
+    for later URLs of that domain. Every `reprobe_every` URLs the skipped
+    tiers are tried again, so a domain can move back to the cheaper tier.
+    """
+
+    def __init__(self, tiers=TIERS, escalate_after=2, reprobe_every=25):
+        self.tiers = list(tiers)
+        self.escalate_after = escalate_after
+        self.reprobe_every = reprobe_every
+        self.lock = threading.Lock()
+        # domain -> {'failures': {tier: consecutive failures}, 'seen': urls routed}
+        self.domains = {}
+
+    def state(self, domain):
+        if domain not in self.domains:
+            self.domains[domain] = {'failures': {}, 'seen': 0}
+        return self.domains[domain]
+
+    def plan(self, url):
+        """Tiers to try for this URL, cheapest useful one first"""
+        domain = domain_of(url)
+        with self.lock:
+            state = self.state(domain)
+            state['seen'] += 1
+            if self.reprobe_every and state['seen'] % self.reprobe_every == 0:
+                return list(self.tiers)
+            start = 0
+            for index, tier in enumerate(self.tiers[:-1]):
+                if state['failures'].get(tier, 0) >= self.escalate_after:
+                    start = index + 1
+                else:
+                    break
+            return self.tiers[start:]
+
+    def record(self, url, tier, success):
+        domain = domain_of(url)
+        with self.lock:
+            failures = self.state(domain)['failures']
+            if success:
+                failures[tier] = 0
+            else:
+                failures[tier] = failures.get(tier, 0) + 1
+
+    def start_tier(self, domain):
+        """Tier later URLs of a domain start at (for display)"""
+        with self.lock:
+            state = self.state(domain)
+            for tier in self.tiers[:-1]:
+                if state['failures'].get(tier, 0) < self.escalate_after:
+                    return tier
+            return self.tiers[-1]
+
+    def save(self, path):
+        with self.lock:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.domains, f, indent=2)
+
+    def load(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.info("No tier history loaded from %s: %s", path, e)
+            return
+        with self.lock:
+            self.domains.update(data)